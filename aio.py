@@ -0,0 +1,381 @@
+"""Асинхронный опрос API Практикума и отправка сообщений в Telegram.
+Все запросы пользователей выполняются конкурентно в одном цикле событий.
+"""
+import asyncio
+import functools
+import os
+import sys
+import time
+from http import HTTPStatus
+
+import aiohttp
+
+import commands
+import metrics
+import templates
+from alerts import ErrorAlerts
+from batching import join_messages
+from botapi import TELEGRAM_API, api_result
+from breaker import practicum_breaker
+from checkpoints import open_checkpoints
+from dedup import DedupCache
+from exceptions import CircuitOpenError, WrongResponseCode
+from history import HistoryStore
+from homework import (ENDPOINT, RETRY_PERIOD, TELEGRAM_TOKEN, check_response,
+                      logger, parse_homeworks)
+from lifecycle import RELOAD_SIGNAL, STOP_SIGNALS
+from outbox import OUTBOX_PIPELINE, Outbox
+from poller import SHUTDOWN_TIMEOUT, TENANTS_FILE
+from ratelimit import practicum_limiter, telegram_limiter
+from responsecache import ResponseCache
+from scheduling import AdaptiveSchedule
+from sessions import POOL_SIZE
+from tenants import load_tenants
+from timeouts import REQUEST_DEADLINE, TIMEOUT
+
+MAX_IN_FLIGHT = int(os.getenv('MAX_IN_FLIGHT', 100))
+CHECKPOINT_INTERVAL = float(os.getenv('CHECKPOINT_INTERVAL', 5))
+# Сколько держать простаивающее соединение aiohttp. У пула requests
+# такой настройки нет: соединение живёт, пока его не закроет сервер.
+KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', 75))
+OUTBOX_IDLE = 1
+
+
+async def get_api_answer(session, timestamp, headers, cache=None):
+    """Асинхронно запрашиваем статусы работ.
+    С кэшем запрос делается условным и при ответе 304 возвращается None.
+    """
+    payload = {'from_date': timestamp}
+    if cache is not None:
+        key = cache.key(headers, timestamp)
+        headers = {**headers, **cache.conditional_headers(key)}
+    practicum_breaker.before()
+    await asyncio.sleep(practicum_limiter.reserve())
+    metrics.polls.inc()
+    start = time.perf_counter()
+    try:
+        async with session.get(
+            ENDPOINT, headers=headers, params=payload
+        ) as response:
+            if response.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                practicum_breaker.failure()
+            else:
+                practicum_breaker.success()
+            if (cache is not None
+                    and response.status == HTTPStatus.NOT_MODIFIED):
+                cache.hit(key)
+                return None
+            if response.status != HTTPStatus.OK:
+                metrics.api_errors.inc(code=response.status)
+                raise WrongResponseCode(
+                    f'Эндпоинт {ENDPOINT} недоступен.'
+                    f'Код ответа API: {response.status}'
+                )
+            answer = await response.json()
+            if cache is not None:
+                cache.remember(key, response.headers, answer)
+            return answer
+    except Exception as errors:
+        if isinstance(errors, (aiohttp.ClientError, asyncio.TimeoutError)):
+            practicum_breaker.failure()
+        if not isinstance(errors, WrongResponseCode):
+            metrics.api_errors.inc(code=type(errors).__name__)
+        logger.error('Ошибка при запросе к основному API: %s', errors)
+        raise WrongResponseCode(f'Ошибка при запросе к API: {errors}')
+    finally:
+        metrics.request_latency.observe(time.perf_counter() - start)
+
+
+async def send_message(session, chat_id, message, token=TELEGRAM_TOKEN):
+    """Асинхронно отправляем сообщение через Bot API."""
+    try:
+        return await deliver_message(session, chat_id, message, token)
+    except Exception as errors:
+        metrics.messages_dropped.inc()
+        logger.error('Ошибка при отправке сообщения в Telegram: %s', errors)
+
+
+async def deliver_message(session, chat_id, message, token=TELEGRAM_TOKEN):
+    """Отправляем сообщение, не перехватывая ошибки Bot API."""
+    url = TELEGRAM_API.format(token=token, method='sendMessage')
+    await asyncio.sleep(telegram_limiter.reserve_key(chat_id))
+    await asyncio.sleep(telegram_limiter.reserve())
+    start = time.perf_counter()
+    payload = {'chat_id': chat_id, 'text': message}
+    if templates.PARSE_MODE:
+        payload['parse_mode'] = templates.PARSE_MODE
+    async with session.post(url, json=payload) as response:
+        result = api_result(await response.json())
+    metrics.send_latency.observe(time.perf_counter() - start)
+    metrics.messages_sent.inc()
+    logger.debug('Cообщение в Telegram было отправлено')
+    return result
+
+
+class AsyncPoller:
+    """Асинхронный опрос всех пользователей в одном цикле событий."""
+
+    def __init__(self, tenants, session, checkpoints, loader=None,
+                 history=None):
+        """Регистрируем пользователей; задачи запускает run()."""
+        self.session = session
+        self.checkpoints = checkpoints
+        self.history = history or HistoryStore()
+        self.loader = loader
+        self.semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+        self.sent = DedupCache(store=checkpoints)
+        self.outbox = Outbox()
+        self.cache = ResponseCache()
+        self.queued = asyncio.Event()
+        self.stopping = asyncio.Event()
+        self.board = commands.StatusBoard()
+        self.alerts = ErrorAlerts(self.alert)
+        self.tenants = {}
+        self.tasks = {}
+        for tenant in tenants:
+            self.add(tenant)
+
+    def add(self, tenant):
+        """Добавляем пользователя, восстанавливая его метку времени."""
+        tenant.current_date = (
+            self.checkpoints.load(tenant.name)
+            or tenant.current_date
+            or int(time.time())
+        )
+        self.tenants[tenant.name] = tenant
+
+    def start(self, tenant, delay=0):
+        """Запускаем задачу периодического опроса пользователя."""
+        self.tasks[tenant.name] = asyncio.ensure_future(
+            self.poll_forever(tenant, delay)
+        )
+
+    def reload(self):
+        """Применяем новый реестр пользователей (по SIGHUP).
+        Сессия, кэши и очередь сообщений сохраняются; у оставшихся
+        пользователей обновляются токен и чат, новые опрашиваются сразу.
+        """
+        try:
+            fresh = {tenant.name: tenant for tenant in self.loader()}
+        except Exception as error:
+            logger.exception('Не удалось перечитать реестр: %s', error)
+            return
+        for name in set(self.tenants) - set(fresh):
+            del self.tenants[name]
+            self.tasks.pop(name).cancel()
+        for name, tenant in fresh.items():
+            current = self.tenants.get(name)
+            if current is None:
+                self.add(tenant)
+                self.start(tenant)
+            else:
+                current.token = tenant.token
+                current.chat_id = tenant.chat_id
+                current.locale = tenant.locale
+        logger.info('Реестр перечитан, пользователей: %s', len(self.tenants))
+
+    def alert(self, chat_id, text):
+        """Ставим уведомление о сбое в общую очередь отправки."""
+        self.outbox.put(chat_id, text)
+        self.queued.set()
+
+    async def pause(self, delay):
+        """Ждём delay секунд; сигнал остановки прерывает ожидание."""
+        try:
+            await asyncio.wait_for(self.stopping.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def poll(self, tenant):
+        """Один опрос API для пользователя; возвращаем работы из ответа.
+        Пока новых статусов нет, from_date не сдвигается: запрос остаётся
+        тем же, и неизменившийся ответ приходит как 304 без тела.
+        """
+        response = await get_api_answer(
+            self.session, tenant.current_date, tenant.headers, self.cache
+        )
+        if response is None:
+            self.board.touch(tenant.chat_id)
+            return []
+        response = check_response(response)
+        self.board.update(tenant.chat_id, response.homeworks)
+        homeworks = self.sent.filter(tenant.chat_id, response.homeworks)
+        if homeworks:
+            self.history.record_all(tenant.name, homeworks)
+            messages = parse_homeworks(homeworks, tenant.locale)
+            for text in join_messages(messages):
+                self.outbox.put(tenant.chat_id, text)
+            self.queued.set()
+        else:
+            logger.debug('Новых статусов нет у %s', tenant.name)
+        if response.homeworks:
+            tenant.current_date = response.current_date
+            self.checkpoints.stage(tenant.name, tenant.current_date)
+        return response.homeworks
+
+    async def poll_forever(self, tenant, delay=0):
+        """Периодически опрашиваем API для одного пользователя."""
+        schedule = AdaptiveSchedule(RETRY_PERIOD)
+        loop = asyncio.get_running_loop()
+        due = loop.time() + delay
+        await self.pause(delay)
+        while not self.stopping.is_set():
+            metrics.loop_lag.observe(max(0, loop.time() - due))
+            async with self.semaphore:
+                try:
+                    schedule.success(await self.poll(tenant))
+                    self.alerts.recovered(tenant.chat_id)
+                except CircuitOpenError as error:
+                    logger.debug(
+                        'Опрос %s пропущен: %s', tenant.name, error
+                    )
+                except Exception as error:
+                    if isinstance(error, WrongResponseCode):
+                        schedule.failure()
+                    logger.exception(
+                        'Сбой при опросе пользователя %s: %s',
+                        tenant.name, error
+                    )
+                    self.alerts.failure(tenant.chat_id, error)
+            delay = schedule.next_delay()
+            due = loop.time() + delay
+            await self.pause(delay)
+
+    async def drain_outbox(self):
+        """Отправляем сообщения из очереди с повторами при ошибках.
+        Сообщения разным чатам уходят пачками до OUTBOX_PIPELINE штук
+        одновременно, по одному на чат, как в Outbox.deliver.
+        """
+        while True:
+            batch = self.outbox.head(OUTBOX_PIPELINE)
+            delay = self.outbox.not_before - time.monotonic()
+            if not batch or delay > 0:
+                self.queued.clear()
+                try:
+                    await asyncio.wait_for(
+                        self.queued.wait(), max(delay, OUTBOX_IDLE)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            results = await asyncio.gather(*(
+                deliver_message(self.session, chat_id, text)
+                for _, chat_id, text in batch
+            ), return_exceptions=True)
+            self.outbox.settle(batch, results)
+
+    async def listen_commands(self, token=TELEGRAM_TOKEN):
+        """Long polling getUpdates в том же цикле событий.
+        Ответы строятся из self.board и уходят сразу, минуя очередь
+        уведомлений; API Практикума при этом не запрашивается.
+        """
+        handler = commands.CommandHandler(self.board)
+        url = TELEGRAM_API.format(token=token, method='getUpdates')
+        timeout = aiohttp.ClientTimeout(
+            connect=TIMEOUT[0],
+            sock_read=commands.UPDATES_TIMEOUT + TIMEOUT[1],
+        )
+        offset = None
+        while True:
+            params = {'timeout': commands.UPDATES_TIMEOUT}
+            if offset is not None:
+                params['offset'] = offset
+            try:
+                async with self.session.get(
+                    url, params=params, timeout=timeout
+                ) as response:
+                    updates = api_result(await response.json())
+            except Exception as error:
+                # 409: задан webhook или getUpdates читает другой процесс
+                logger.error('Ошибка при получении команд: %s', error)
+                await asyncio.sleep(commands.UPDATES_TIMEOUT / 10)
+                continue
+            for update in updates:
+                offset = update['update_id'] + 1
+                reply = handler.reply(update)
+                if reply is not None:
+                    await send_message(self.session, *reply, token)
+
+    async def flush_checkpoints(self):
+        """Раз в CHECKPOINT_INTERVAL сохраняем накопленные метки."""
+        while True:
+            await asyncio.sleep(CHECKPOINT_INTERVAL)
+            self.checkpoints.commit()
+            self.history.commit()
+
+    async def run(self):
+        """Запускаем все задачи опроса и отправки.
+        Вместе с ними в том же цикле обслуживаются команды /status
+        и /history. По SIGTERM или SIGINT опросы завершаются на ближайшей
+        паузе, очередь сообщений досылается, метки сохраняются; по SIGHUP
+        реестр перечитывается без пересоздания сессии.
+        """
+        loop = asyncio.get_running_loop()
+        for signum in STOP_SIGNALS:
+            loop.add_signal_handler(signum, self.stopping.set)
+        if RELOAD_SIGNAL is not None and self.loader:
+            loop.add_signal_handler(RELOAD_SIGNAL, self.reload)
+        background = [
+            asyncio.ensure_future(self.flush_checkpoints()),
+            asyncio.ensure_future(self.drain_outbox()),
+        ]
+        if commands.BOT_COMMANDS:
+            background.append(asyncio.ensure_future(self.listen_commands()))
+        step = RETRY_PERIOD / max(len(self.tenants), 1)
+        for index, tenant in enumerate(list(self.tenants.values())):
+            self.start(tenant, index * step)
+        try:
+            await self.stopping.wait()
+            if self.tasks:
+                await asyncio.wait(
+                    list(self.tasks.values()), timeout=SHUTDOWN_TIMEOUT
+                )
+            deadline = loop.time() + SHUTDOWN_TIMEOUT
+            while len(self.outbox) and loop.time() < deadline:
+                await asyncio.sleep(OUTBOX_IDLE / 10)
+        finally:
+            for task in background + list(self.tasks.values()):
+                task.cancel()
+            self.checkpoints.commit()
+            self.history.close()
+            self.outbox.close()
+            logger.info('Опрос остановлен')
+
+
+def create_session():
+    """Клиентская сессия aiohttp с пулом keep-alive соединений."""
+    connector = aiohttp.TCPConnector(
+        limit=max(POOL_SIZE, MAX_IN_FLIGHT),
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=REQUEST_DEADLINE, connect=TIMEOUT[0], sock_read=TIMEOUT[1]
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+async def run(tenants, checkpoints, loader=None):
+    """Запускаем опрос всех пользователей в одном цикле событий."""
+    async with create_session() as session:
+        await AsyncPoller(tenants, session, checkpoints, loader).run()
+
+
+def main():
+    """Запускаем асинхронный опрос всех пользователей из реестра."""
+    if not TELEGRAM_TOKEN:
+        logger.critical('Отсутствует обязательная переменная '
+                        'окружения: TELEGRAM_TOKEN')
+        sys.exit(1)
+    tenants = load_tenants(TENANTS_FILE)
+    checkpoints = open_checkpoints()
+    metrics.start_server()
+    try:
+        asyncio.run(run(
+            tenants, checkpoints, functools.partial(load_tenants, TENANTS_FILE)
+        ))
+    finally:
+        checkpoints.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Уведомления о сбоях без потока одинаковых сообщений."""
+import os
+import re
+import time
+
+import templates
+
+ALERT_INTERVAL = float(os.getenv('ALERT_INTERVAL', 3600))
+ERROR_ALERTS = os.getenv('ERROR_ALERTS', '0') == '1'
+ALERT_CHAT_ID = os.getenv('ALERT_CHAT_ID')
+
+VOLATILE = re.compile(r'0x[0-9a-fA-F]+|\d{5,}')
+
+
+def fingerprint(error):
+    """Отпечаток ошибки: тип и текст без адресов и меток времени.
+    Короткие числа (коды ответа) остаются, поэтому 500 и 401
+    считаются разными сбоями.
+    """
+    return f'{type(error).__name__}:{VOLATILE.sub("#", str(error))}'
+
+
+class Incident:
+    """Текущий сбой: первое сообщение и число подавленных повторов."""
+
+    __slots__ = ('text', 'started', 'reported', 'repeats', 'total')
+
+    def __init__(self, text, now):
+        """Сбой с текстом text, впервые замеченный в момент now."""
+        self.text = text
+        self.started = now
+        self.reported = now
+        self.repeats = 0
+        self.total = 1
+
+
+class ErrorAlerts:
+    """Отправка уведомлений о сбоях в чат.
+    О новом сбое сообщаем сразу, повторы того же сбоя считаем и
+    не чаще раза в interval секунд присылаем сводку. После первого
+    успешного опроса сообщаем о восстановлении.
+    Уведомления выключены по умолчанию (ERROR_ALERTS=0): текст
+    исключения может содержать адреса и параметры запросов, и его не
+    стоит показывать студентам. Если задан operator_chat, все
+    уведомления уходят туда с пометкой исходного чата.
+    При enabled=False сбои только пишутся в журнал вызывающим кодом.
+    """
+
+    def __init__(self, send, interval=ALERT_INTERVAL, enabled=ERROR_ALERTS,
+                 clock=time.monotonic, operator_chat=ALERT_CHAT_ID):
+        """send(chat_id, text) - функция отправки уведомления."""
+        self.send = send
+        self.interval = interval
+        self.enabled = enabled
+        self.operator_chat = operator_chat
+        self.clock = clock
+        self.incidents = {}
+
+    def failure(self, chat_id, error):
+        """Учитываем сбой и при необходимости отправляем уведомление."""
+        if not self.enabled:
+            return
+        now = self.clock()
+        incidents = self.incidents.setdefault(chat_id, {})
+        key = fingerprint(error)
+        incident = incidents.get(key)
+        if incident is None:
+            incident = incidents[key] = Incident(
+                f'Сбой в работе программы: {error}', now
+            )
+            self._send(chat_id, incident.text)
+            return
+        incident.repeats += 1
+        incident.total += 1
+        elapsed = now - incident.reported
+        if elapsed >= self.interval:
+            self._send(chat_id, (
+                f'{incident.text}\nСбой продолжается: ещё '
+                f'{incident.repeats} раз за {_minutes(elapsed)}'
+            ))
+            incident.reported = now
+            incident.repeats = 0
+
+    def recovered(self, chat_id):
+        """Сообщаем о восстановлении, если в чате были сбои."""
+        incidents = self.incidents.pop(chat_id, None)
+        if not incidents:
+            return
+        now = self.clock()
+        lines = ['Работа восстановлена.']
+        lines.extend(
+            f'{incident.text} - {incident.total} раз за '
+            f'{_minutes(now - incident.started)}'
+            for incident in incidents.values()
+        )
+        self._send(chat_id, '\n'.join(lines))
+
+    def _send(self, chat_id, text):
+        if self.operator_chat is not None:
+            chat_id, text = self.operator_chat, f'Чат {chat_id}: {text}'
+        # В тексте сбоя бывают <, _ и точки: экранируем под разметку
+        self.send(chat_id, templates.ESCAPE(text))
+
+
+def _minutes(seconds):
+    return f'{max(1, round(seconds / 60))} мин'
@@ -0,0 +1,42 @@
+"""Объединение нескольких уведомлений для одного чата в одно сообщение."""
+MESSAGE_LIMIT = 4096
+SEPARATOR = '\n\n'
+
+
+def join_messages(messages, limit=MESSAGE_LIMIT, separator=SEPARATOR):
+    """Склеиваем сообщения в куски не длиннее limit символов."""
+    chunk = ''
+    for message in messages:
+        if not chunk:
+            chunk = message
+        elif len(chunk) + len(separator) + len(message) <= limit:
+            chunk = f'{chunk}{separator}{message}'
+        else:
+            yield chunk
+            chunk = message
+    if chunk:
+        yield chunk
+
+
+class MessageBatch:
+    """Накопитель уведомлений, сгруппированных по чатам."""
+
+    def __init__(self, limit=MESSAGE_LIMIT):
+        """Пустой накопитель; limit - наибольшая длина сообщения."""
+        self.limit = limit
+        self.chats = {}
+
+    def __len__(self):
+        """Число накопленных уведомлений во всех чатах."""
+        return sum(len(messages) for messages in self.chats.values())
+
+    def add(self, chat_id, message):
+        """Добавляем уведомление для чата."""
+        self.chats.setdefault(chat_id, []).append(message)
+
+    def drain(self):
+        """Отдаём пары (чат, склеенный текст) и очищаем накопитель."""
+        chats, self.chats = self.chats, {}
+        for chat_id, messages in chats.items():
+            for text in join_messages(messages, self.limit):
+                yield chat_id, text
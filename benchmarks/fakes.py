@@ -0,0 +1,112 @@
+"""Локальные заглушки API Практикума и Bot API Telegram для замеров."""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Общая часть заглушек: задержка, доля ошибок и тишина в журнале."""
+
+    protocol_version = 'HTTP/1.1'
+    wbufsize = -1
+
+    def delay_or_fail(self):
+        """Имитируем задержку и случайную ошибку 500."""
+        config = self.server.config
+        if config['latency']:
+            time.sleep(config['latency'])
+        if random.random() < config['error_rate']:
+            self.reply(500, {'code': 'internal_error'})
+            return True
+        return False
+
+    def reply(self, status, data):
+        """Отправляем JSON-ответ."""
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не пишем запросы к заглушкам в журнал."""
+
+
+class PracticumHandler(FakeHandler):
+    """GET homework_statuses: payload_size работ, одна из них меняется."""
+
+    def do_GET(self):
+        """Отдаём список работ."""
+        if self.delay_or_fail():
+            return
+        config = self.server.config
+        self.server.requests += 1
+        statuses = ('reviewing', 'approved', 'rejected')
+        homeworks = [
+            {
+                'id': number,
+                'homework_name': f'bench_{number}.zip',
+                'status': statuses[
+                    (number + self.server.requests) % len(statuses)
+                ],
+                'reviewer_comment': 'x' * 64,
+                'date_updated': time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'sent_at': time.time(),
+            }
+            for number in range(config['payload_size'])
+        ]
+        self.reply(200, {
+            'homeworks': homeworks, 'current_date': int(time.time())
+        })
+
+
+class TelegramHandler(FakeHandler):
+    """POST /bot<token>/sendMessage: запоминаем время получения и текст.
+    GET /bot<token>/getUpdates отдаёт накопленные в server.updates
+    обновления.
+    """
+
+    def do_GET(self):
+        """Отдаём обновления и очищаем их список."""
+        updates, self.server.updates = self.server.updates, []
+        self.reply(200, {'ok': True, 'result': updates})
+
+    def do_POST(self):
+        """Принимаем сообщение."""
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length)
+        if self.delay_or_fail():
+            return
+        self.server.received.append(time.time())
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            data = {}
+        self.server.messages.append(data)
+        self.reply(200, {'ok': True, 'result': {
+            'message_id': len(self.server.received),
+            'date': int(time.time()),
+            'chat': {'id': data.get('chat_id', 0), 'type': 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+def start(handler, latency=0.0, error_rate=0.0, payload_size=1):
+    """Запускаем заглушку в фоновом потоке и возвращаем сервер."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    server.config = {
+        'latency': latency,
+        'error_rate': error_rate,
+        'payload_size': payload_size,
+    }
+    server.requests = 0
+    server.received = []
+    server.messages = []
+    server.updates = []
+    server.url = f'http://127.0.0.1:{server.server_port}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,165 @@
+"""Замеры производительности бота на локальных заглушках.
+Запуск из корня репозитория:
+    python -m benchmarks.run --tenants 200 --latency 0.02 --mode async
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+import telegram
+
+import aio
+import homework
+from benchmarks import fakes
+from checkpoints import MemoryCheckpointStore
+from poller import Poller
+from ratelimit import RateLimiter
+from sessions import create_session
+from tenants import Tenant
+
+UNLIMITED = 1e9
+
+
+def make_tenants(count):
+    """Набор пользователей для замера."""
+    return [Tenant(f'token{number}', number, 0) for number in range(count)]
+
+
+def report(name, polls, elapsed, latencies, memory, tenants):
+    """Печатаем результаты замера."""
+    print(f'[{name}]')
+    print(f'  опросов в секунду: {polls / elapsed:.1f}')
+    if latencies:
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f'  задержка уведомления, медиана: '
+              f'{statistics.median(latencies) * 1000:.1f} мс, '
+              f'p95: {p95 * 1000:.1f} мс')
+    print(f'  памяти на пользователя: {memory / tenants / 1024:.1f} КиБ')
+
+
+def traced_memory(before):
+    """Сколько памяти выделено с момента снимка before."""
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(
+        stat.size_diff for stat in after.compare_to(before, 'filename')
+    )
+
+
+def bench_sync(args, practicum, telegram_server):
+    """Замер синхронного Poller.
+    Память считается по созданию Poller и первому циклу опроса,
+    скорость - по остальным циклам без трассировки.
+    """
+    homework.ENDPOINT = f'{practicum.url}/api/user_api/homework_statuses/'
+    bot = telegram.Bot(
+        token='123:bench', base_url=f'{telegram_server.url}/bot'
+    )
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    engine = Poller(
+        make_tenants(args.tenants), bot,
+        session=create_session(pool_size=args.pool_size),
+        checkpoints=MemoryCheckpointStore(),
+    )
+    engine.run_due(now=float('inf'))
+    engine.outbox.deliver(engine.send)
+    memory = traced_memory(before)
+    polls = 0
+    elapsed = 0
+    latencies = []
+    for _ in range(args.cycles):
+        sent_before = len(telegram_server.received)
+        started = time.time()
+        start = time.perf_counter()
+        polls += engine.run_due(now=float('inf'))
+        elapsed += time.perf_counter() - start
+        engine.outbox.deliver(engine.send)
+        latencies.extend(
+            received - started
+            for received in telegram_server.received[sent_before:]
+        )
+    report('sync', polls, elapsed, latencies, memory, args.tenants)
+
+
+async def poll_cycle(engine):
+    """Один цикл асинхронного опроса с отправкой всех уведомлений."""
+    await asyncio.gather(
+        *(engine.poll(tenant) for tenant in engine.tenants.values()),
+        return_exceptions=True
+    )
+    polled = time.perf_counter()
+    while len(engine.outbox):
+        await asyncio.sleep(0.001)
+    return polled
+
+
+async def bench_async(args, practicum, telegram_server):
+    """Замер асинхронного AsyncPoller, устроенный как bench_sync."""
+    aio.ENDPOINT = f'{practicum.url}/api/user_api/homework_statuses/'
+    aio.TELEGRAM_API = f'{telegram_server.url}/bot{{token}}/{{method}}'
+    polls = 0
+    elapsed = 0
+    latencies = []
+    async with aio.create_session() as session:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        engine = aio.AsyncPoller(
+            make_tenants(args.tenants), session, MemoryCheckpointStore()
+        )
+        drain = asyncio.ensure_future(engine.drain_outbox())
+        await poll_cycle(engine)
+        memory = traced_memory(before)
+        for _ in range(args.cycles):
+            sent_before = len(telegram_server.received)
+            started = time.time()
+            start = time.perf_counter()
+            elapsed += await poll_cycle(engine) - start
+            polls += len(engine.tenants)
+            latencies.extend(
+                received - started
+                for received in telegram_server.received[sent_before:]
+            )
+        drain.cancel()
+    report('async', polls, elapsed, latencies, memory, args.tenants)
+
+
+def main():
+    """Разбираем параметры и запускаем замеры."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.01,
+                        help='задержка заглушек, секунд')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--payload-size', type=int, default=1,
+                        help='число работ в ответе Практикума')
+    parser.add_argument('--pool-size', type=int, default=10)
+    parser.add_argument('--mode', choices=('sync', 'async', 'both'),
+                        default='both')
+    args = parser.parse_args()
+
+    homework.logger.disabled = True
+    limiter = RateLimiter(UNLIMITED, UNLIMITED)
+    homework.practicum_limiter = homework.telegram_limiter = limiter
+    aio.practicum_limiter = aio.telegram_limiter = limiter
+    practicum = fakes.start(
+        fakes.PracticumHandler, args.latency, args.error_rate,
+        args.payload_size
+    )
+    telegram_server = fakes.start(fakes.TelegramHandler, args.latency)
+    try:
+        if args.mode in ('sync', 'both'):
+            bench_sync(args, practicum, telegram_server)
+        if args.mode in ('async', 'both'):
+            asyncio.run(bench_async(args, practicum, telegram_server))
+    finally:
+        practicum.shutdown()
+        telegram_server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Время импорта точек входа бота.
+Каждый модуль импортируется в отдельном процессе с -X importtime,
+поэтому замер показывает холодный старт, как при перезапуске дайно.
+Запуск из корня репозитория:
+    python -m benchmarks.startup --repeat 5 homework poller
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = ('homework', 'poller', 'aio', 'sharding', 'history')
+HEAVY = ('telegram', 'requests', 'dotenv', 'aiohttp', 'http.server')
+FAKE_ENV = {
+    'TOKEN_PRACTICUM': 'startup',
+    'TOKEN_TELEGRAM': 'startup',
+    'CHAT_ID_TELEGRAM': '1',
+}
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+PROBE = (
+    'import sys, lazy, {module}; '
+    'print(*(name for name in sys.argv[1:] if lazy.is_loaded(name)))'
+)
+
+
+def measure(module, env=None):
+    """Импортируем модуль в чистом процессе.
+    Возвращаем суммарное время импорта в микросекундах, время прямых
+    зависимостей модуля и тяжёлые зависимости, которые успели
+    загрузиться (отложенные не считаются).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         PROBE.format(module=module), *HEAVY],
+        env=env, capture_output=True, text=True, check=True
+    )
+    total = 0
+    children = {}
+    found = {}
+    # -X importtime печатает зависимости раньше импортировавшего их
+    # модуля, поэтому копим прямые зависимости до строки верхнего уровня.
+    for match in LINE.finditer(result.stderr):
+        _, cumulative, indent, name = match.groups()
+        if not indent:
+            if name == module:
+                total, children = int(cumulative), found
+            found = {}
+        elif len(indent) == 2:
+            found[name] = int(cumulative)
+    return total, children, result.stdout.split()
+
+
+def report(module, runs, top):
+    """Печатаем медиану времени импорта и самые дорогие зависимости."""
+    totals = [total for total, _, _ in runs]
+    _, children, loaded = min(runs, key=lambda run: run[0])
+    print(f'[{module}]')
+    print(f'  импорт, медиана: {statistics.median(totals) / 1000:.1f} мс')
+    print(f'  тяжёлые зависимости: {", ".join(loaded) or "не загружены"}')
+    for name, cumulative in sorted(
+        children.items(), key=lambda item: item[1], reverse=True
+    )[:top]:
+        print(f'    {name}: {cumulative / 1000:.1f} мс')
+
+
+def main():
+    """Разбираем параметры и замеряем импорт модулей."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('modules', nargs='*', default=ENTRY_POINTS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5,
+                        help='сколько зависимостей показать')
+    parser.add_argument('--dotenv', action='store_true',
+                        help='не задавать токены, чтобы читался .env')
+    args = parser.parse_args()
+    env = dict(os.environ)
+    if not args.dotenv:
+        env.update(FAKE_ENV)
+    for module in args.modules:
+        runs = [measure(module, env) for _ in range(args.repeat)]
+        report(module, runs, args.top)
+
+
+if __name__ == '__main__':
+    main()
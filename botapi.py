@@ -0,0 +1,126 @@
+"""Минимальный клиент Telegram Bot API поверх пула соединений requests.
+Боту нужны только sendMessage и getUpdates, поэтому вместо
+python-telegram-bot с его собственной сетевой частью запросы идут
+напрямую через сессию с keep-alive соединениями.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from exceptions import TelegramAPIError
+from lazy import lazy_import
+from timeouts import TIMEOUT
+
+sessions = lazy_import('sessions')
+telegram = lazy_import('telegram')
+
+TELEGRAM_API = 'https://api.telegram.org/bot{token}/{method}'
+TELEGRAM_CLIENT = os.getenv('TELEGRAM_CLIENT', 'http')
+
+
+def api_result(answer):
+    """Результат ответа Bot API или TelegramAPIError с retry_after."""
+    if not answer.get('ok'):
+        raise TelegramAPIError(
+            answer.get('description'),
+            answer.get('parameters', {}).get('retry_after'),
+            answer.get('error_code')
+        )
+    return answer['result']
+
+
+class Update:
+    """Обновление getUpdates с тем же интерфейсом, что у telegram.Update."""
+
+    __slots__ = ('update_id', 'data')
+
+    def __init__(self, data):
+        """Оборачиваем словарь обновления из ответа getUpdates."""
+        self.update_id = data['update_id']
+        self.data = data
+
+    def to_dict(self):
+        """Обновление в виде словаря Bot API."""
+        return self.data
+
+
+class BotClient:
+    """Клиент Bot API с методами send_message и get_updates.
+    Запросы идут через сессию из sessions.create_session: соединения
+    с api.telegram.org переиспользуются между отправками. pipeline()
+    отправляет пачку запросов параллельно по соединениям пула.
+    """
+
+    def __init__(self, token, session=None, pool_size=None):
+        """Без session создаём сессию с пулом из pool_size соединений."""
+        self.token = token
+        self.pool_size = pool_size or sessions.POOL_SIZE
+        self.session = session or sessions.create_session(self.pool_size)
+        self.executor = None
+
+    def call(self, method, params, timeout=None):
+        """Вызываем метод Bot API и возвращаем его результат.
+        timeout - пара (connect, read); без неё действует таймаут сессии.
+        """
+        url = TELEGRAM_API.format(token=self.token, method=method)
+        kwargs = {} if timeout is None else {'timeout': timeout}
+        response = self.session.post(url, json=params, **kwargs)
+        return api_result(response.json())
+
+    def send_message(self, chat_id, text, parse_mode=None):
+        """Отправляем сообщение в чат."""
+        params = {'chat_id': chat_id, 'text': text}
+        if parse_mode:
+            params['parse_mode'] = parse_mode
+        return self.call('sendMessage', params)
+
+    def get_updates(self, offset=None, timeout=0):
+        """Long polling: ждём новые обновления до timeout секунд.
+        Таймаут чтения увеличен на время ожидания на стороне Telegram.
+        """
+        connect, read = TIMEOUT
+        updates = self.call(
+            'getUpdates', {'offset': offset, 'timeout': timeout},
+            timeout=(connect, read + timeout)
+        )
+        return [Update(update) for update in updates]
+
+    def pipeline(self, calls):
+        """Выполняем вызовы параллельно, не больше pool_size сразу.
+        Возвращаем результаты в порядке calls; ошибка вызова
+        возвращается на месте результата, а не поднимается.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                self.pool_size, thread_name_prefix='telegram'
+            )
+        futures = [self.executor.submit(call) for call in calls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as error:
+                results.append(error)
+        return results
+
+    def close(self):
+        """Останавливаем потоки pipeline и закрываем соединения."""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.session.close()
+
+
+def create_bot(token, client=TELEGRAM_CLIENT):
+    """Клиент Bot API: встроенный (http) или python-telegram-bot (ptb)."""
+    if client == 'http':
+        return BotClient(token)
+    return telegram.Bot(token=token)
+
+
+def close_bot(bot):
+    """Закрываем соединения встроенного клиента.
+    У telegram.Bot метод close() - это вызов Bot API, поэтому его
+    объекты не трогаем.
+    """
+    if isinstance(bot, BotClient):
+        bot.close()
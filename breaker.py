@@ -0,0 +1,84 @@
+"""Автоматический выключатель запросов к API Практикума."""
+import logging
+import os
+import threading
+import time
+
+import metrics
+from exceptions import CircuitOpenError
+from logs import LOGGER_NAME
+
+CIRCUIT_FAILURES = int(os.getenv('CIRCUIT_FAILURES', 5))
+CIRCUIT_RESET = float(os.getenv('CIRCUIT_RESET', 30))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+STATES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class CircuitBreaker:
+    """Выключатель closed/open/half-open, общий для всех опросов.
+    После failures ошибок подряд он размыкается, и запросы отклоняются
+    без обращения к сети. Через reset секунд пропускается один пробный
+    запрос: удачный замыкает цепь, неудачный размыкает её снова.
+    """
+
+    def __init__(self, failures=CIRCUIT_FAILURES, reset=CIRCUIT_RESET,
+                 name='practicum', clock=time.monotonic):
+        """Цепь размыкается после failures сбоев подряд на reset секунд."""
+        self.failures = failures
+        self.reset = reset
+        self.name = name
+        self.clock = clock
+        self.state = CLOSED
+        self.errors = 0
+        self.opened_at = 0
+        self.lock = threading.Lock()
+        metrics.circuit_state.set(STATES[CLOSED], circuit=name)
+
+    def before(self):
+        """Разрешаем запрос или поднимаем CircuitOpenError.
+        Если пробный запрос так и не завершился (например, его задачу
+        отменили), через reset секунд пропускается следующий.
+        """
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            now = self.clock()
+            retry_in = self.opened_at + self.reset - now
+            if retry_in <= 0:
+                self.opened_at = now
+                if self.state != HALF_OPEN:
+                    self._switch(HALF_OPEN)
+                return
+        metrics.circuit_rejected.inc(circuit=self.name)
+        raise CircuitOpenError(
+            f'Запросы к {self.name} приостановлены', retry_in
+        )
+
+    def success(self):
+        """Запрос удался: сбрасываем счётчик и замыкаем цепь."""
+        with self.lock:
+            self.errors = 0
+            if self.state != CLOSED:
+                self._switch(CLOSED)
+
+    def failure(self):
+        """Запрос не удался: размыкаем цепь после порога ошибок."""
+        with self.lock:
+            self.errors += 1
+            if self.state == HALF_OPEN or self.errors >= self.failures:
+                self.opened_at = self.clock()
+                if self.state != OPEN:
+                    self._switch(OPEN)
+
+    def _switch(self, state):
+        self.state = state
+        metrics.circuit_state.set(STATES[state], circuit=self.name)
+        logger.warning('Выключатель %s: %s', self.name, state)
+
+
+practicum_breaker = CircuitBreaker()
@@ -0,0 +1,63 @@
+"""Догоняющий опрос после простоя.
+Если сохранённая метка времени старше CATCHUP_AFTER секунд, пропущенные
+изменения статусов забираются постранично, упорядочиваются по времени
+и отправляются с отдельным ограничением частоты, чтобы накопившаяся
+очередь не упиралась в лимиты Telegram.
+"""
+import os
+import time
+
+from history import changed_at
+
+CATCHUP_AFTER = float(os.getenv('CATCHUP_AFTER', 3600))
+CATCHUP_PAGE = int(os.getenv('CATCHUP_PAGE', 100))
+MAX_PAGES = 100
+UNDATED = float('inf')
+
+
+def needs_catch_up(watermark, now=None, after=CATCHUP_AFTER):
+    """Метка сохранена и отстала от текущего времени больше чем на after."""
+    if not watermark:
+        return False
+    return (time.time() if now is None else now) - watermark > after
+
+
+def chronological(homeworks):
+    """Работы по возрастанию date_updated; порядок равных сохраняется.
+    Работы без даты остаются в конце в исходном порядке.
+    """
+    return sorted(homeworks, key=_updated)
+
+
+def fetch_backlog(fetch, since, page=CATCHUP_PAGE, max_pages=MAX_PAGES):
+    """Все изменения статусов с момента since.
+    fetch(from_date) возвращает проверенный ответ (schema.Checked).
+    Ответ из page работ и больше мог быть усечён, поэтому следующая
+    страница запрашивается с from_date, равным самому позднему
+    date_updated из полученных; повторы одной и той же смены статуса
+    отбрасываются. Возвращаем работы в хронологическом порядке и
+    current_date последнего ответа.
+    """
+    backlog = {}
+    cursor = current_date = since
+    for _ in range(max_pages):
+        checked = fetch(cursor)
+        current_date = checked.current_date or current_date
+        latest = cursor
+        for homework in checked.homeworks:
+            key = (
+                homework.get('homework_name'), homework.get('status'),
+                homework.get('date_updated')
+            )
+            backlog.setdefault(key, homework)
+            latest = max(latest, changed_at(homework, cursor))
+        if len(checked.homeworks) < page or latest <= cursor:
+            break
+        cursor = latest
+    return chronological(backlog.values()), current_date
+
+
+def _updated(homework):
+    if not hasattr(homework, 'get'):
+        return UNDATED
+    return changed_at(homework, UNDATED)
@@ -0,0 +1,127 @@
+"""Хранилище последних меток времени current_date по пользователям."""
+import os
+import sqlite3
+import time
+
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'checkpoints.sqlite3')
+
+
+class MemoryCheckpointStore:
+    """Хранилище в памяти: ничего не переживает перезапуск."""
+
+    def __init__(self):
+        """Пустое хранилище без сохранённых меток."""
+        self.values = {}
+        self.pending = {}
+        self.notifications = {}
+
+    def load(self, name):
+        """Возвращаем сохранённую метку или None."""
+        return self.pending.get(name, self.values.get(name))
+
+    def stage(self, name, current_date):
+        """Запоминаем метку до ближайшего commit()."""
+        self.pending[name] = current_date
+
+    def load_notifications(self, now, prefix=''):
+        """Возвращаем неустаревшие ключи отправленных уведомлений."""
+        return {}
+
+    def stage_notification(self, key, expires):
+        """Запоминаем ключ уведомления до ближайшего commit()."""
+        self.notifications[key] = expires
+
+    def commit(self):
+        """Сохраняем накопленные метки одной операцией."""
+        self.values.update(self.pending)
+        self.pending.clear()
+        self.notifications.clear()
+
+    def save(self, name, current_date):
+        """Сохраняем одну метку сразу."""
+        self.stage(name, current_date)
+        self.commit()
+
+    def close(self):
+        """Закрываем хранилище, сохраняя накопленное."""
+        self.commit()
+
+
+class SQLiteCheckpointStore(MemoryCheckpointStore):
+    """Хранилище в файле SQLite.
+    Журнал WAL пишет изменения последовательно в конец файла, а все
+    метки за цикл опроса фиксируются одной транзакцией. При
+    synchronous=NORMAL коммит не вызывает fsync: журнал сбрасывается
+    на диск только при checkpoint WAL. После сбоя питания последние
+    метки могут откатиться, база при этом остаётся целой, а повторно
+    найденные изменения отсекает дедупликация.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        """Открываем базу path и создаём таблицы, если их нет."""
+        super().__init__()
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoints '
+            '(name TEXT PRIMARY KEY, watermark INTEGER NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS notifications '
+            '(key TEXT PRIMARY KEY, expires REAL NOT NULL)'
+        )
+
+    def load(self, name):
+        """Возвращаем метку: ещё не сохранённую или прочитанную из файла.
+        Метка читается при каждом вызове, поэтому пользователь, которого
+        передали другому процессу, продолжает с его последней метки.
+        """
+        if name in self.pending:
+            return self.pending[name]
+        row = self.connection.execute(
+            'SELECT watermark FROM checkpoints WHERE name = ?', (name,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def load_notifications(self, now, prefix=''):
+        """Загружаем неустаревшие ключи, начинающиеся с prefix."""
+        return dict(self.connection.execute(
+            'SELECT key, expires FROM notifications '
+            'WHERE expires > ? AND substr(key, 1, ?) = ?',
+            (now, len(prefix), prefix)
+        ))
+
+    def commit(self):
+        """Сохраняем накопленные метки одной транзакцией."""
+        if not self.pending and not self.notifications:
+            return
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO checkpoints (name, watermark) '
+                'VALUES (?, ?)',
+                self.pending.items()
+            )
+            if self.notifications:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO notifications (key, expires) '
+                    'VALUES (?, ?)',
+                    self.notifications.items()
+                )
+                self.connection.execute(
+                    'DELETE FROM notifications WHERE expires <= ?',
+                    (time.time(),)
+                )
+        super().commit()
+
+    def close(self):
+        """Сохраняем накопленное и закрываем соединение."""
+        self.commit()
+        self.connection.close()
+
+
+def open_checkpoints(path=CHECKPOINT_PATH):
+    """Открываем хранилище; пустой путь отключает запись на диск."""
+    if not path:
+        return MemoryCheckpointStore()
+    return SQLiteCheckpointStore(path)
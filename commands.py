@@ -0,0 +1,164 @@
+"""Команды бота /status и /history.
+Ответы собираются из последнего известного состояния опроса, поэтому
+команда не порождает запросов к API Практикума.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import templates
+from homework import HOMEWORK_VERDICTS, logger
+
+BOT_COMMANDS = os.getenv('BOT_COMMANDS', '1') == '1'
+HISTORY_SIZE = int(os.getenv('HISTORY_SIZE', 10))
+UPDATES_TIMEOUT = int(os.getenv('UPDATES_TIMEOUT', 30))
+TIME_FORMAT = '%d.%m.%Y %H:%M'
+
+HELP = (
+    'Команды:\n'
+    '/status - последние известные статусы работ\n'
+    '/history - последние изменения статусов'
+)
+UNKNOWN_CHAT = 'Для этого чата уведомления не настроены.'
+NO_STATUSES = 'Статусов пока нет: работы ещё не менялись.'
+NO_HISTORY = 'Изменений статусов пока не было.'
+
+
+def chat_key(chat_id):
+    """Идентификатор чата в реестре и в Telegram приводим к строке."""
+    return str(chat_id)
+
+
+class StatusBoard:
+    """Последние статусы работ и история их изменений по чатам.
+    Обновляется циклом опроса, читается обработчиком команд
+    из другого потока, поэтому все обращения идут под замком.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        """history_size - сколько смен статуса помнить на чат."""
+        self.history_size = history_size
+        self.latest = {}
+        self.history = {}
+        self.checked = {}
+        self.lock = threading.Lock()
+
+    def touch(self, chat_id, now=None):
+        """Запоминаем время успешного опроса без новых данных."""
+        with self.lock:
+            self.checked[chat_key(chat_id)] = now or time.time()
+
+    def update(self, chat_id, homeworks, now=None):
+        """Учитываем работы из ответа API."""
+        now = now or time.time()
+        key = chat_key(chat_id)
+        with self.lock:
+            self.checked[key] = now
+            latest = self.latest.setdefault(key, {})
+            history = self.history.setdefault(
+                key, deque(maxlen=self.history_size)
+            )
+            for homework in homeworks:
+                name = homework.get('homework_name')
+                status = homework.get('status')
+                if name is None or latest.get(name) == status:
+                    continue
+                latest[name] = status
+                history.append((now, name, status))
+
+    def status(self, chat_id):
+        """Текст ответа на /status."""
+        key = chat_key(chat_id)
+        with self.lock:
+            if key not in self.checked:
+                return UNKNOWN_CHAT
+            latest = dict(self.latest.get(key, {}))
+            checked = self.checked[key]
+        if not latest:
+            return NO_STATUSES
+        checked = time.strftime(TIME_FORMAT, time.localtime(checked))
+        lines = [f'Проверено {checked}:']
+        lines.extend(
+            f'"{name}": {HOMEWORK_VERDICTS.get(status, status)}'
+            for name, status in latest.items()
+        )
+        return '\n'.join(lines)
+
+    def recent(self, chat_id):
+        """Текст ответа на /history."""
+        key = chat_key(chat_id)
+        with self.lock:
+            if key not in self.checked:
+                return UNKNOWN_CHAT
+            history = list(self.history.get(key, ()))
+        if not history:
+            return NO_HISTORY
+        return '\n'.join(
+            f'{time.strftime(TIME_FORMAT, time.localtime(changed))} '
+            f'"{name}": {HOMEWORK_VERDICTS.get(status, status)}'
+            for changed, name, status in reversed(history)
+        )
+
+
+class CommandHandler:
+    """Разбор входящих сообщений и ответы на команды."""
+
+    def __init__(self, board):
+        """Ответы на команды строятся по данным board."""
+        self.board = board
+        self.commands = {
+            '/start': lambda chat_id: HELP,
+            '/help': lambda chat_id: HELP,
+            '/status': board.status,
+            '/history': board.recent,
+        }
+
+    def reply(self, update):
+        """Ответ на update Bot API: пара (chat_id, текст) или None.
+        Текст экранируется под MESSAGE_FORMAT, как и уведомления.
+        """
+        message = update.get('message') or {}
+        text = message.get('text') or ''
+        chat_id = message.get('chat', {}).get('id')
+        if chat_id is None or not text.startswith('/'):
+            return None
+        command = text.split()[0].split('@')[0].lower()
+        handler = self.commands.get(command)
+        if handler is None:
+            return None
+        return chat_id, templates.ESCAPE(handler(chat_id))
+
+
+def listen(bot, handler, send, stop, timeout=UPDATES_TIMEOUT):
+    """Цикл long polling getUpdates для синхронного бота.
+    Ответы отправляются через send(chat_id, text) в обход очереди
+    уведомлений, но с общим ограничением частоты Telegram.
+    """
+    offset = None
+    while not stop.is_set():
+        try:
+            updates = bot.get_updates(offset=offset, timeout=timeout)
+        except Exception as error:
+            logger.error('Ошибка при получении команд: %s', error)
+            stop.wait(timeout / 10)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            answer = handler.reply(update.to_dict())
+            if answer is None:
+                continue
+            try:
+                send(*answer)
+            except Exception as error:
+                logger.error('Ошибка при ответе на команду: %s', error)
+
+
+def start(bot, handler, send):
+    """Запускаем listen в фоновом потоке; возвращаем событие остановки."""
+    stop = threading.Event()
+    threading.Thread(
+        target=listen, args=(bot, handler, send, stop),
+        name='commands', daemon=True
+    ).start()
+    return stop
@@ -0,0 +1,87 @@
+"""Подавление повторных уведомлений об одном и том же статусе."""
+import os
+import time
+from collections import OrderedDict
+
+DEDUP_SIZE = int(os.getenv('DEDUP_SIZE', 10000))
+DEDUP_TTL = int(os.getenv('DEDUP_TTL', 30 * 24 * 60 * 60))
+
+
+def notification_key(chat_id, homework):
+    """Ключ уведомления: чат, работа, статус и время обновления."""
+    identity = homework.get('id', homework.get('homework_name'))
+    return (f'{chat_id}:{identity}:{homework.get("status")}:'
+            f'{homework.get("date_updated", "")}')
+
+
+class DedupCache:
+    """Ограниченный по размеру и времени жизни кэш отправленных ключей.
+    Ключи хранятся в порядке добавления, поэтому вытеснение и очистка
+    устаревших записей идут с начала словаря за O(1) на запись.
+    Если передано хранилище, ключи переживают перезапуск.
+    """
+
+    def __init__(self, size=DEDUP_SIZE, ttl=DEDUP_TTL, store=None):
+        """Загружаем из store ключи, срок которых не истёк."""
+        self.size = size
+        self.ttl = ttl
+        self.store = store
+        self.entries = OrderedDict()
+        if store is not None:
+            for key, expires in sorted(
+                store.load_notifications(time.time()).items(),
+                key=lambda item: item[1]
+            ):
+                self.entries[key] = expires
+            self._evict(time.time())
+
+    def __len__(self):
+        """Число ключей в кэше, включая ещё не вытесненные устаревшие."""
+        return len(self.entries)
+
+    def __contains__(self, key):
+        """Ключ есть в кэше и его срок не истёк."""
+        expires = self.entries.get(key)
+        return expires is not None and expires > time.time()
+
+    def add(self, key, now=None):
+        """Запоминаем ключ; возвращаем False, если он уже был."""
+        if now is None:
+            now = time.time()
+        self._evict(now)
+        if key in self.entries:
+            return False
+        expires = now + self.ttl
+        self.entries[key] = expires
+        if self.store is not None:
+            self.store.stage_notification(key, expires)
+        self._evict(now)
+        return True
+
+    def refresh(self, chat_id, now=None):
+        """Подгружаем ключи чата, записанные в хранилище другим процессом.
+        Нужно для пользователя, переехавшего к этому процессу.
+        """
+        if self.store is None:
+            return
+        if now is None:
+            now = time.time()
+        for key, expires in self.store.load_notifications(
+            now, f'{chat_id}:'
+        ).items():
+            self.entries.setdefault(key, expires)
+        self._evict(now)
+
+    def filter(self, chat_id, homeworks, now=None):
+        """Оставляем только работы, о которых ещё не сообщали."""
+        return [
+            homework for homework in homeworks
+            if self.add(notification_key(chat_id, homework), now)
+        ]
+
+    def _evict(self, now):
+        while self.entries and (
+            len(self.entries) > self.size
+            or next(iter(self.entries.values())) <= now
+        ):
+            self.entries.popitem(last=False)
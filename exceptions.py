@@ -1,6 +1,40 @@
 class WrongResponseCode(Exception):
+    """API ответил кодом, отличным от 200, или запрос не удался."""
+
     pass
 
 
-class OutCustomException(Exception):
+class TelegramAPIError(Exception):
+    """Bot API вернул ошибку.
+    retry_after - сколько ждать перед повтором, error_code - код ошибки.
+    """
+
+    def __init__(self, message, retry_after=None, error_code=None):
+        """Ошибка с текстом message из ответа Bot API."""
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.error_code = error_code
+
+
+class CircuitOpenError(Exception):
+    """Выключатель разомкнут; retry_after - когда будет пробный запрос."""
+
+    def __init__(self, message, retry_after=None):
+        """Ошибка с текстом message и временем до пробного запроса."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ShutdownRequested(Exception):
+    """Процесс получил сигнал остановки."""
+
     pass
+
+
+class SchemaError(TypeError):
+    """Данные не соответствуют схеме; violations - все найденные нарушения."""
+
+    def __init__(self, violations):
+        """Ошибка со списком нарушений violations."""
+        super().__init__('; '.join(violations))
+        self.violations = violations
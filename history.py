@@ -0,0 +1,193 @@
+"""История смен статусов работ и аналитические запросы к ней.
+Запуск из корня репозитория:
+    python history.py review --tenant 12345
+    python history.py rejections
+"""
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from checkpoints import CHECKPOINT_PATH
+
+HISTORY_PATH = os.getenv('HISTORY_PATH', CHECKPOINT_PATH)
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS labels '
+    '(id INTEGER PRIMARY KEY, value TEXT NOT NULL UNIQUE)',
+    'CREATE TABLE IF NOT EXISTS events '
+    '(tenant INTEGER NOT NULL, homework INTEGER NOT NULL, '
+    'project INTEGER NOT NULL, status INTEGER NOT NULL, '
+    'changed INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS events_homework '
+    'ON events (tenant, homework, changed)',
+    'CREATE INDEX IF NOT EXISTS events_status ON events (status, project)',
+)
+EVENTS = (
+    'SELECT t.value, h.value, p.value, s.value, e.changed FROM events e '
+    'JOIN labels t ON t.id = e.tenant JOIN labels h ON h.id = e.homework '
+    'JOIN labels p ON p.id = e.project JOIN labels s ON s.id = e.status'
+)
+TIME_IN_REVIEW = (
+    'SELECT t.value, h.value, SUM(r.next - r.changed) FROM ('
+    ' SELECT tenant, homework, status, changed, LEAD(changed) OVER ('
+    '  PARTITION BY tenant, homework ORDER BY changed'
+    ' ) AS next FROM events{where}'
+    ') r JOIN labels t ON t.id = r.tenant JOIN labels h ON h.id = r.homework '
+    'WHERE r.next IS NOT NULL AND r.status = ('
+    " SELECT id FROM labels WHERE value = 'reviewing'"
+    ') GROUP BY r.tenant, r.homework ORDER BY t.value, h.value'
+)
+REJECTIONS = (
+    'SELECT p.value, COUNT(*) FROM events e '
+    'JOIN labels p ON p.id = e.project '
+    "WHERE e.status = (SELECT id FROM labels WHERE value = 'rejected'){where} "
+    'GROUP BY e.project ORDER BY COUNT(*) DESC, p.value'
+)
+
+
+def changed_at(homework, default=None):
+    """Время смены статуса из date_updated.
+    Без даты возвращаем default, а если он не задан - текущее время.
+    """
+    date_updated = homework.get('date_updated')
+    if date_updated:
+        try:
+            return int(datetime.strptime(date_updated, DATE_FORMAT).replace(
+                tzinfo=timezone.utc
+            ).timestamp())
+        except ValueError:
+            pass
+    return int(time.time()) if default is None else default
+
+
+class HistoryStore:
+    """Журнал смен статусов в SQLite.
+    Строки (пользователь, работа, проект, статус) хранятся один раз
+    в словаре labels, а событие - пятью целыми числами, поэтому
+    миллионы событий занимают десятки мегабайт. События только
+    добавляются и пишутся пачкой в commit(); запросы агрегируют их
+    на стороне SQLite и отдают результат по строкам, не загружая
+    всю историю в память.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        """Открываем базу path; без path история хранится в памяти."""
+        self.connection = sqlite3.connect(path or ':memory:', timeout=30)
+        if path:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+        self.labels = {}
+        self.pending = []
+
+    def record(self, tenant, homework):
+        """Запоминаем смену статуса до ближайшего commit()."""
+        self.pending.append((
+            str(tenant),
+            homework.get('homework_name'),
+            homework.get('lesson_name') or homework.get('homework_name'),
+            homework.get('status'),
+            changed_at(homework),
+        ))
+
+    def record_all(self, tenant, homeworks):
+        """Запоминаем все работы из ответа API."""
+        for homework in homeworks:
+            self.record(tenant, homework)
+
+    def commit(self):
+        """Записываем накопленные события одной транзакцией."""
+        if not self.pending:
+            return
+        try:
+            with self.connection:
+                rows = [
+                    (*map(self._label, event[:4]), event[4])
+                    for event in self.pending
+                ]
+                self.connection.executemany(
+                    'INSERT INTO events (tenant, homework, project, status, '
+                    'changed) VALUES (?, ?, ?, ?, ?)', rows
+                )
+        except sqlite3.Error:
+            self.labels.clear()
+            raise
+        self.pending.clear()
+
+    def close(self):
+        """Сохраняем накопленное и закрываем соединение."""
+        self.commit()
+        self.connection.close()
+
+    def events(self, tenant=None):
+        """События (пользователь, работа, проект, статус, время)."""
+        if tenant is None:
+            return self.connection.execute(EVENTS + ' ORDER BY e.rowid')
+        return self.connection.execute(
+            EVENTS + ' WHERE t.value = ? ORDER BY e.rowid', (str(tenant),)
+        )
+
+    def time_in_review(self, tenant=None):
+        """Сколько секунд каждая работа провела на ревью.
+        Считаются интервалы от статуса reviewing до следующей смены
+        статуса той же работы; текущее ревью не учитывается.
+        """
+        where, params = self._tenant_filter(tenant, ' WHERE tenant')
+        return self.connection.execute(
+            TIME_IN_REVIEW.format(where=where), params
+        )
+
+    def rejections_per_project(self, tenant=None):
+        """Число возвратов работы на доработку по проектам."""
+        where, params = self._tenant_filter(tenant, ' AND e.tenant')
+        return self.connection.execute(
+            REJECTIONS.format(where=where), params
+        )
+
+    def _tenant_filter(self, tenant, column):
+        if tenant is None:
+            return '', ()
+        return (
+            f'{column} = (SELECT id FROM labels WHERE value = ?)',
+            (str(tenant),)
+        )
+
+    def _label(self, value):
+        label = self.labels.get(value)
+        if label is None:
+            self.connection.execute(
+                'INSERT OR IGNORE INTO labels (value) VALUES (?)', (value,)
+            )
+            label = self.labels[value] = self.connection.execute(
+                'SELECT id FROM labels WHERE value = ?', (value,)
+            ).fetchone()[0]
+        return label
+
+
+def main():
+    """Печатаем отчёт по истории статусов."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('report', choices=('review', 'rejections'))
+    parser.add_argument('--tenant')
+    parser.add_argument('--path', default=HISTORY_PATH)
+    args = parser.parse_args()
+    store = HistoryStore(args.path)
+    try:
+        if args.report == 'review':
+            rows = store.time_in_review(args.tenant)
+            for tenant, homework, seconds in rows:
+                print(f'{tenant}\t{homework}\t{seconds / 3600:.1f} ч')
+        else:
+            for project, count in store.rejections_per_project(args.tenant):
+                print(f'{project}\t{count}')
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,47 @@
 """Проверка домашки."""
+import functools
 import logging
 import os
 import sys
 import time
 from http import HTTPStatus
 
-import requests
-import telegram
-from dotenv import load_dotenv
+import logs
+import metrics
+import schema
+import templates
+from alerts import ErrorAlerts
+from batching import join_messages
+from botapi import TELEGRAM_CLIENT, BotClient, close_bot
+from breaker import practicum_breaker
+from catchup import chronological, fetch_backlog, needs_catch_up
+from checkpoints import open_checkpoints
+from dedup import DedupCache, notification_key
+from exceptions import SchemaError, ShutdownRequested, WrongResponseCode
+from history import HistoryStore
+from lazy import lazy_import
+from lifecycle import Lifecycle
+from ratelimit import catchup_limiter, practicum_limiter, telegram_limiter
+from scheduling import AdaptiveSchedule
+from timeouts import TIMEOUT
 
-from exceptions import OutCustomException, WrongResponseCode
+dotenv = lazy_import('dotenv')
+requests = lazy_import('requests')
+telegram = lazy_import('telegram')
 
-load_dotenv()
+ENV_TOKENS = ('TOKEN_PRACTICUM', 'TOKEN_TELEGRAM', 'CHAT_ID_TELEGRAM')
+
+
+def load_env(override=False):
+    """Читаем файл .env, если токенов нет в окружении.
+    На сервере токены приходят через окружение, и python-dotenv
+    даже не загружается.
+    """
+    if override or not all(os.getenv(name) for name in ENV_TOKENS):
+        dotenv.load_dotenv(override=override)
+
+
+load_env()
 
 TELEGRAM_TOKEN = os.getenv('TOKEN_TELEGRAM')
 TELEGRAM_CHAT_ID = os.getenv('CHAT_ID_TELEGRAM')
@@ -19,20 +49,11 @@ PRACTICUM_TOKEN = os.getenv('TOKEN_PRACTICUM')
 RETRY_PERIOD = 600
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
-HOMEWORK_VERDICTS = {
-    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
-    'reviewing': 'Работа взята на проверку ревьюером.',
-    'rejected': 'Работа проверена: у ревьюера есть замечания.'
-}
+HOMEWORK_VERDICTS = templates.CATALOG['ru']['verdicts']
 
-logger = logging.getLogger(__name__)
+logger = logging.getLogger(logs.LOGGER_NAME)
 logger.setLevel(logging.DEBUG)
-handler = logging.StreamHandler(stream=sys.stdout)
-formatter = logging.Formatter(
-    '%(asctime)s, %(levelname)s, %(funcName)s, %(message)s'
-)
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+log_listener = logs.configure(logger)
 
 
 def check_tokens():
@@ -44,56 +65,153 @@ def check_tokens():
     error_message = ', '.join(not_tokens)
     if error_message:
         logger.critical('Отсутствует обязательная переменная '
-                        f'окружения: {error_message}', exc_info=True)
+                        'окружения: %s', error_message)
         return False
     return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
 
 
+def reload_config():
+    """Перечитываем переменные окружения и файл .env (по SIGHUP).
+    Новые значения применяются, только если заданы все токены; иначе
+    бот продолжает работать с прежними настройками.
+    """
+    global TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, PRACTICUM_TOKEN, HEADERS
+    load_env(override=True)
+    practicum, telegram_token, chat_id = map(os.getenv, ENV_TOKENS)
+    missing = [
+        name for name, value in zip(
+            ENV_TOKENS, (practicum, telegram_token, chat_id)
+        ) if not value
+    ]
+    if missing:
+        logger.critical('Отсутствует обязательная переменная окружения: '
+                        '%s. Оставляем прежние настройки', ', '.join(missing))
+        return False
+    PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID = (
+        practicum, telegram_token, chat_id
+    )
+    HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+    logger.info('Настройки перечитаны')
+    return True
+
+
+def reload_bot(bot):
+    """Перечитываем настройки и возвращаем клиент Bot API.
+    Клиент пересоздаётся, только если сменился токен Telegram: иначе
+    прогретый пул соединений остаётся.
+    """
+    token = TELEGRAM_TOKEN
+    if not reload_config() or TELEGRAM_TOKEN == token:
+        return bot
+    close_bot(bot)
+    return type(bot)(token=TELEGRAM_TOKEN)
+
+
 def send_message(bot, message):
     """Отправляем сообщение в Telegram чат."""
+    return send_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_to_chat(bot, chat_id, message):
+    """Отправляем сообщение в произвольный Telegram чат."""
     try:
-        send = bot.send_message(TELEGRAM_CHAT_ID, message)
-        logger.debug('Cообщение в Telegram было отправлено')
-        return send
+        return deliver_message(bot, chat_id, message)
     except Exception as errors:
-        logger.error(f'Ошибка при отправке сообщения в Telegram: {errors}')
+        metrics.messages_dropped.inc()
+        logger.error('Ошибка при отправке сообщения в Telegram: %s', errors)
+
+
+@metrics.send_latency.time
+def deliver_message(bot, chat_id, message):
+    """Отправляем сообщение, не перехватывая ошибки Telegram."""
+    telegram_limiter.acquire(chat_id)
+    if templates.PARSE_MODE:
+        send = bot.send_message(
+            chat_id, message, parse_mode=templates.PARSE_MODE
+        )
+    else:
+        send = bot.send_message(chat_id, message)
+    metrics.messages_sent.inc()
+    logger.debug('Cообщение в Telegram было отправлено')
+    return send
+
+
+def deliver_messages(bot, messages):
+    """Отправляем пачку сообщений (чат, текст) разным чатам параллельно.
+    Нужен клиент с pipeline(), например botapi.BotClient. Возвращаем
+    результат или исключение для каждого сообщения.
+    """
+    return bot.pipeline([
+        functools.partial(deliver_message, bot, chat_id, message)
+        for chat_id, message in messages
+    ])
 
 
 def get_api_answer(timestamp):
     """Делает запрос к единственному эндпоинту API-сервиса."""
+    return request_homeworks(timestamp, HEADERS)
+
+
+@metrics.request_latency.time
+def request_homeworks(timestamp, headers, session=requests, cache=None,
+                      timeout=TIMEOUT):
+    """Запрашиваем статусы работ с заголовками конкретного пользователя.
+    С кэшем запрос делается условным и при ответе 304 возвращается None.
+    timeout - пара (connect, read): зависшее соединение не остановит опрос.
+    """
     payload = {'from_date': timestamp}
+    if cache is not None:
+        key = cache.key(headers, timestamp)
+        headers = {**headers, **cache.conditional_headers(key)}
+    practicum_breaker.before()
+    practicum_limiter.acquire()
+    metrics.polls.inc()
     try:
-        response = requests.get(
-            ENDPOINT, headers=HEADERS, params=payload
+        response = session.get(
+            ENDPOINT, headers=headers, params=payload, timeout=timeout
         )
+        if response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            practicum_breaker.failure()
+        else:
+            practicum_breaker.success()
+        if (cache is not None
+                and response.status_code == HTTPStatus.NOT_MODIFIED):
+            cache.hit(key)
+            return None
         if response.status_code != HTTPStatus.OK:
+            metrics.api_errors.inc(code=response.status_code)
             error = (f'Эндпоинт {ENDPOINT} недоступен.'
                      f'Код ответа API: {response.status_code}'
                      )
             raise WrongResponseCode(error)
-        return response.json()
+        answer = response.json()
+        if cache is not None:
+            cache.remember(key, response.headers, answer)
+        return answer
     except Exception as errors:
-        logger.error(f'Ошибка при запросе к основному API: {errors}')
+        if isinstance(errors, requests.RequestException):
+            practicum_breaker.failure()
+        if not isinstance(errors, WrongResponseCode):
+            metrics.api_errors.inc(code=type(errors).__name__)
+        logger.error('Ошибка при запросе к основному API: %s', errors)
         raise WrongResponseCode(f'Ошибка при запросе к API: {errors}')
 
 
+@metrics.check_latency.time
 def check_response(response):
-    """Проверяем ответ API на соответствие документации."""
-    if not isinstance(response, dict):
-        logger.error('В ответе API не словарь')
-        raise TypeError('В ответе API не словарь')
-    if 'homeworks' not in response:
-        logger.error('Список домашних работ пуст, '
-                     'в response нет ключа homeworks', exc_info=True)
-        raise KeyError('В response нет ключа homeworks ')
-    if 'current_date' not in response:
-        logger.error('Список домашних работ пуст, '
-                     'в response нет ключа current_date', exc_info=True)
-        raise KeyError('В response нет ключа current_date')
-    if not isinstance(response['homeworks'], list):
-        logger.error('В словаре не список')
-        raise TypeError('В словаре не список')
-    return response
+    """Проверяем ответ API на соответствие документации.
+    Возвращаем запись с корректными работами; все нарушения схемы
+    в самом ответе собираются в одно исключение SchemaError.
+    """
+    try:
+        checked = schema.load_response(response)
+    except SchemaError as error:
+        logger.error('Ответ API не соответствует документации: %s', error)
+        raise
+    if checked.rejected:
+        logger.error('Пропущены работы с ошибками: %s',
+                     '; '.join(checked.rejected))
+    return checked
 
 
 def parse_status(homework):
@@ -101,50 +219,141 @@ def parse_status(homework):
     Далее функция возвращает подготовленную для отправки в Telegram строку,
     содержащую один из вердиктов словаря HOMEWORK_VERDICTS.
     """
-    if 'homework_name' not in homework:
-        logger.error('В response нет ключа homework_name')
-        raise KeyError('В response нет ключа homework_name')
-    if 'status' not in homework:
-        logger.error('В response нет ключа status')
-        raise KeyError('В response нет ключа status')
-    status = homework['status']
-    if status not in HOMEWORK_VERDICTS:
-        raise OutCustomException('Неожиданный статус работы '
-                                 f'в API {status}'
-                                 )
-    response = ('Изменился статус проверки работы '
-                f'"{homework["homework_name"]}". '
-                f'{HOMEWORK_VERDICTS[status]}'
-                )
+    return render_status(homework)
+
+
+@metrics.parse_latency.time
+def render_status(homework, locale=templates.DEFAULT_LOCALE):
+    """Собираем уведомление на языке locale.
+    Словарь работы сначала проверяется по схеме, запись из
+    check_response используется как есть.
+    """
+    if not isinstance(homework, schema.Record):
+        try:
+            homework = schema.HOMEWORK.load(homework)
+        except SchemaError as error:
+            logger.error('Работа не соответствует документации: %s', error)
+            raise
+    response = templates.render(homework, locale)
     logger.info(response)
     return response
 
 
+def parse_homeworks(homeworks, locale=templates.DEFAULT_LOCALE):
+    """Извлекаем статусы всех работ из ответа API.
+    Работа с некорректными данными логируется и пропускается,
+    чтобы не потерять остальные изменения статусов. Уведомления идут
+    в порядке смены статусов (date_updated).
+    """
+    for homework in chronological(homeworks):
+        try:
+            yield render_status(homework, locale)
+        except SchemaError as error:
+            logger.error('Пропущена работа с ошибкой: %s', error)
+
+
+def notify(bot, homeworks):
+    """Отправляем сообщения обо всех изменившихся статусах."""
+    if not homeworks:
+        logger.debug('Новых статусов нет')
+        return
+    for message in join_messages(parse_homeworks(homeworks)):
+        send_message(bot, message)
+        logger.debug('Сообщение о новом статусе было отправлено')
+
+
+def catch_up(bot, timestamp, sent, history, lifecycle=None):
+    """Догоняем изменения статусов, пропущенные за время простоя.
+    Работает, только если метка timestamp устарела (catchup.CATCHUP_AFTER).
+    Накопившиеся уведомления уходят по времени смены статуса и не
+    чаще CATCHUP_RATE в секунду. Возвращаем новую метку; при сбое -
+    прежнюю, и обычный опрос начнёт с неё.
+    Сигнал остановки прерывает ожидание между отправками исключением
+    ShutdownRequested. Работы отмечаются отправленными только после
+    всей рассылки, поэтому прерванная рассылка повторится целиком.
+    """
+    if not needs_catch_up(timestamp):
+        return timestamp
+    logger.info('Догоняем изменения с %s', timestamp)
+    try:
+        homeworks, current_date = fetch_backlog(
+            lambda from_date: check_response(get_api_answer(from_date)),
+            timestamp
+        )
+    except Exception as error:
+        logger.exception('Не удалось получить пропущенное: %s', error)
+        return timestamp
+    homeworks = [
+        homework for homework in homeworks
+        if notification_key(TELEGRAM_CHAT_ID, homework) not in sent
+    ]
+    lifecycle = lifecycle or Lifecycle()
+    for message in join_messages(parse_homeworks(homeworks)):
+        with lifecycle.interruptible():
+            catchup_limiter.acquire()
+        send_message(bot, message)
+    sent.filter(TELEGRAM_CHAT_ID, homeworks)
+    history.record_all(TELEGRAM_CHAT_ID, homeworks)
+    history.commit()
+    logger.info('Пропущенных изменений отправлено: %s', len(homeworks))
+    return current_date
+
+
 def main():
     """Основная логика работы бота."""
     if not check_tokens():
         sys.exit(1)
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    while True:
-        try:
-            response = get_api_answer(timestamp)
-            check_response(response)
-            timestamp = response.get('current_date')
-            homeworks = response.get('homeworks')
-            if homeworks:
-                homework = homeworks[0]
-                message = parse_status(homework)
-                send_message(bot, message)
-                logging.debug('Сообщение о новом статусе было отправлено')
-            else:
-                logger.debug('Новых статусов нет')
-
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.exception(message)
-        finally:
-            time.sleep(RETRY_PERIOD)
+    if TELEGRAM_CLIENT == 'http':
+        bot = BotClient(TELEGRAM_TOKEN)
+    else:
+        bot = telegram.Bot(token=TELEGRAM_TOKEN)
+    checkpoints = open_checkpoints()
+    timestamp = checkpoints.load(TELEGRAM_CHAT_ID) or int(time.time())
+    sent = DedupCache(store=checkpoints)
+    history = HistoryStore()
+    schedule = AdaptiveSchedule(RETRY_PERIOD)
+    alerts = ErrorAlerts(
+        lambda chat_id, text: send_to_chat(bot, chat_id, text)
+    )
+    metrics.start_server()
+    lifecycle = Lifecycle().install()
+    try:
+        timestamp = catch_up(bot, timestamp, sent, history, lifecycle)
+        checkpoints.save(TELEGRAM_CHAT_ID, timestamp)
+        due = time.monotonic()
+        while not lifecycle.stopping:
+            metrics.loop_lag.observe(max(0, time.monotonic() - due))
+            if lifecycle.take_reload():
+                bot = reload_bot(bot)
+            try:
+                response = get_api_answer(timestamp)
+                checked = check_response(response)
+                timestamp = checked.current_date
+                checkpoints.save(TELEGRAM_CHAT_ID, timestamp)
+                schedule.success(checked.homeworks)
+                homeworks = sent.filter(TELEGRAM_CHAT_ID, checked.homeworks)
+                history.record_all(TELEGRAM_CHAT_ID, homeworks)
+                history.commit()
+                notify(bot, homeworks)
+                alerts.recovered(TELEGRAM_CHAT_ID)
+            except Exception as error:
+                if isinstance(error, WrongResponseCode):
+                    schedule.failure()
+                logger.exception('Сбой в работе программы: %s', error)
+                alerts.failure(TELEGRAM_CHAT_ID, error)
+            finally:
+                delay = schedule.next_delay()
+                due = time.monotonic() + delay
+                with lifecycle.interruptible():
+                    time.sleep(delay)
+    except ShutdownRequested:
+        pass
+    finally:
+        lifecycle.uninstall()
+        checkpoints.close()
+        history.close()
+        close_bot(bot)
+    logger.info('Бот остановлен')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,38 @@
+"""Отложенный импорт тяжёлых зависимостей."""
+import importlib.util
+import sys
+import types
+
+# Имена модулей, созданных через lazy_import: до первого обращения
+# LazyLoader подменяет их тип, после загрузки возвращает ModuleType.
+DEFERRED = set()
+
+
+def lazy_import(name):
+    """Модуль, который загружается при первом обращении к атрибуту.
+    Пока атрибуты не нужны, импорт почти ничего не стоит. Модуль
+    регистрируется в sys.modules, поэтому обычный import в другом
+    месте получит тот же объект. Уже загруженный модуль возвращается
+    как есть.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    DEFERRED.add(name)
+    return module
+
+
+def is_loaded(name):
+    """Модуль импортирован и уже выполнен, а не только отложен."""
+    module = sys.modules.get(name)
+    if module is None:
+        return False
+    return name not in DEFERRED or type(module) is types.ModuleType
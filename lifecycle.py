@@ -0,0 +1,80 @@
+"""Сигналы процесса: мягкая остановка по SIGTERM и перезагрузка по SIGHUP."""
+import signal
+import threading
+from contextlib import contextmanager
+
+from exceptions import ShutdownRequested
+
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+RELOAD_SIGNAL = getattr(signal, 'SIGHUP', None)
+
+
+class Lifecycle:
+    """Флаги остановки и перезагрузки, выставляемые обработчиками сигналов.
+    Обработчик не прерывает текущий опрос или отправку: работа
+    завершается на ближайшей паузе между опросами. Пауза внутри
+    interruptible() прерывается сразу исключением ShutdownRequested.
+    """
+
+    def __init__(self):
+        """Состояние до установки обработчиков сигналов."""
+        self.stopping = False
+        self.reload_requested = False
+        self.wakeup = threading.Event()
+        self._sleeping = False
+        self._previous = {}
+
+    def install(self):
+        """Подключаем обработчики сигналов (только из главного потока)."""
+        for signum in STOP_SIGNALS:
+            self._previous[signum] = signal.signal(signum, self._stop)
+        if RELOAD_SIGNAL is not None:
+            self._previous[RELOAD_SIGNAL] = signal.signal(
+                RELOAD_SIGNAL, self._reload
+            )
+        return self
+
+    def uninstall(self):
+        """Возвращаем прежние обработчики сигналов."""
+        for signum, handler in self._previous.items():
+            signal.signal(signum, handler)
+        self._previous.clear()
+
+    def stop(self):
+        """Просим процесс завершиться."""
+        self.stopping = True
+        self.wakeup.set()
+
+    def request_reload(self):
+        """Просим перечитать настройки."""
+        self.reload_requested = True
+        self.wakeup.set()
+
+    def take_reload(self):
+        """Была ли запрошена перезагрузка; флаг при этом сбрасывается."""
+        requested, self.reload_requested = self.reload_requested, False
+        return requested
+
+    @contextmanager
+    def interruptible(self):
+        """Участок, который сигнал остановки прерывает немедленно."""
+        if self.stopping:
+            raise ShutdownRequested()
+        self._sleeping = True
+        try:
+            yield
+        finally:
+            self._sleeping = False
+
+    def wait(self, timeout):
+        """Ждём timeout секунд или до ближайшего сигнала."""
+        self.wakeup.wait(timeout)
+        self.wakeup.clear()
+
+    def _stop(self, signum, frame):
+        self.stop()
+        if self._sleeping:
+            raise ShutdownRequested()
+
+    def _reload(self, signum, frame):
+        self.request_reload()
@@ -0,0 +1,93 @@
+"""Настройка журнала: JSON или текст, запись через фоновый поток."""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# Общий логгер бота: имя не зависит от того, запущен ли homework.py
+# скриптом (__main__) или импортирован как модуль.
+LOGGER_NAME = 'homework'
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+TEXT_FORMAT = '%(asctime)s, %(levelname)s, %(funcName)s, %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись журнала - одна строка JSON."""
+
+    def format(self, record):
+        """Собираем словарь полей записи и сериализуем его."""
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'func': record.funcName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Кладём запись в очередь как есть, не форматируя её.
+    Сообщение собирается из шаблона и аргументов уже в фоновом потоке.
+    При переполненной очереди запись отбрасывается, а не ждёт места.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        """Оставляем форматирование обработчику в фоновом потоке."""
+        return record
+
+    def enqueue(self, record):
+        """Не блокируемся на переполненной очереди."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BackgroundListener(QueueListener):
+    """Слушатель очереди, который можно безопасно остановить дважды."""
+
+    def enqueue_sentinel(self):
+        """Ждём места в очереди: поток-слушатель её разбирает."""
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        """Дописываем очередь и останавливаем поток, если он запущен."""
+        if self._thread is not None:
+            super().stop()
+
+
+def create_formatter(log_format=LOG_FORMAT):
+    """Форматтер для выбранного формата журнала."""
+    if log_format == 'json':
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+
+def configure(logger, log_format=LOG_FORMAT, queue_size=LOG_QUEUE_SIZE):
+    """Подключаем к логгеру вывод в stdout.
+    При queue_size > 0 запись в stdout идёт из фонового потока
+    QueueListener, и медленный stdout не задерживает опрос API.
+    Возвращаем слушатель очереди или None.
+    """
+    stream_handler = logging.StreamHandler(stream=sys.stdout)
+    stream_handler.setFormatter(create_formatter(log_format))
+    if queue_size <= 0:
+        logger.addHandler(stream_handler)
+        return None
+    records = queue.Queue(maxsize=queue_size)
+    logger.addHandler(NonBlockingQueueHandler(records))
+    listener = BackgroundListener(
+        records, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
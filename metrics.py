@@ -0,0 +1,214 @@
+"""Счётчики и гистограммы задержек в текстовом формате Prometheus."""
+import functools
+import os
+import threading
+import time
+
+from lazy import lazy_import
+
+http_server = lazy_import('http.server')
+
+METRICS_PORT = os.getenv('METRICS_PORT')
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LAG_BUCKETS = (0.1, 1, 5, 15, 30, 60, 120, 300, 600)
+
+REGISTRY = []
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{value}"' for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}'
+
+
+class Counter:
+    """Монотонно растущий счётчик с метками."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        """Регистрируем счётчик для выдачи на /metrics."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        """Увеличиваем счётчик."""
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Текущее значение счётчика."""
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        return self.values.get(key, 0)
+
+    def samples(self):
+        """Строки выдачи для /metrics."""
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in items:
+            yield f'{self.name}{_labels(self.labels, key)} {value}'
+
+
+class Gauge(Counter):
+    """Значение, которое может как расти, так и уменьшаться."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        """Устанавливаем значение."""
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram:
+    """Гистограмма распределения значений (обычно секунд)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        """Регистрируем гистограмму с границами buckets."""
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value):
+        """Учитываем одно значение."""
+        with self.lock:
+            self.count += 1
+            self.sum += value
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+
+    def time(self, func):
+        """Декоратор: измеряем время выполнения функции."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(time.perf_counter() - start)
+        return wrapper
+
+    def samples(self):
+        """Строки выдачи для /metrics (бакеты накопительные)."""
+        with self.lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+        cumulative = 0
+        for bound, value in zip(self.buckets, counts):
+            cumulative += value
+            yield f'{self.name}_bucket{{le="{bound}"}} {cumulative}'
+        yield f'{self.name}_bucket{{le="+Inf"}} {count}'
+        yield f'{self.name}_sum {total}'
+        yield f'{self.name}_count {count}'
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+@functools.lru_cache(maxsize=None)
+def metrics_handler():
+    """Класс обработчика /metrics.
+    Он создаётся при запуске сервера, поэтому без METRICS_PORT
+    http.server не загружается.
+    """
+
+    class MetricsHandler(http_server.BaseHTTPRequestHandler):
+        """Отдаём метрики по GET /metrics."""
+
+        def do_GET(self):
+            """Обрабатываем запрос к /metrics."""
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            """Не пишем каждый запрос к /metrics в журнал."""
+
+    return MetricsHandler
+
+
+def start_server(port=METRICS_PORT, host='0.0.0.0'):
+    """Запускаем HTTP-сервер метрик в фоновом потоке, если задан порт."""
+    if port in (None, ''):
+        return None
+    server = http_server.ThreadingHTTPServer(
+        (host, int(port)), metrics_handler()
+    )
+    threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    ).start()
+    return server
+
+
+polls = Counter('homework_polls_total', 'Запросы к API Практикума')
+api_errors = Counter(
+    'homework_api_errors_total', 'Ошибки API Практикума', ('code',)
+)
+messages_sent = Counter(
+    'homework_messages_sent_total', 'Отправленные сообщения Telegram'
+)
+messages_dropped = Counter(
+    'homework_messages_dropped_total', 'Потерянные сообщения Telegram'
+)
+outbox_size = Gauge(
+    'homework_outbox_size', 'Сообщения в очереди на отправку'
+)
+send_failures = Counter(
+    'homework_send_failures_total', 'Неудачные попытки отправки в Telegram'
+)
+circuit_state = Gauge(
+    'homework_circuit_state',
+    'Состояние выключателя: 0 - замкнут, 1 - разомкнут, 2 - пробный запрос',
+    ('circuit',)
+)
+circuit_rejected = Counter(
+    'homework_circuit_rejected_total',
+    'Запросы, отклонённые разомкнутым выключателем', ('circuit',)
+)
+request_latency = Histogram(
+    'homework_get_api_answer_seconds', 'Время запроса к API Практикума'
+)
+check_latency = Histogram(
+    'homework_check_response_seconds', 'Время проверки ответа API'
+)
+parse_latency = Histogram(
+    'homework_parse_status_seconds', 'Время разбора статуса работы'
+)
+send_latency = Histogram(
+    'homework_send_message_seconds', 'Время отправки сообщения в Telegram'
+)
+loop_lag = Histogram(
+    'homework_loop_lag_seconds',
+    'Опоздание опроса относительно запланированного времени',
+    LAG_BUCKETS
+)
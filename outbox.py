@@ -0,0 +1,272 @@
+"""Очередь исходящих сообщений в Telegram с повторными попытками."""
+import json
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+import metrics
+from homework import logger
+
+OUTBOX_SIZE = int(os.getenv('OUTBOX_SIZE', 10000))
+OUTBOX_SPOOL = os.getenv('OUTBOX_SPOOL', '')
+OUTBOX_SPOOL_LIMIT = int(os.getenv('OUTBOX_SPOOL_LIMIT', 1 << 20))
+OUTBOX_PIPELINE = int(os.getenv('OUTBOX_PIPELINE', 10))
+PIPELINE_SCAN = 10
+OUTBOX_ATTEMPTS = int(os.getenv('OUTBOX_ATTEMPTS', 10))
+MIN_RETRY = 1
+MAX_RETRY = 300
+PERMANENT_CODES = (400, 403, 404)
+# Ошибки python-telegram-bot, которые повтор не исправит. Unauthorized
+# означает и неверный токен (401), поэтому постоянной считаем только
+# блокировку бота пользователем (403 Forbidden).
+PERMANENT_ERRORS = ('BadRequest', 'ChatMigrated')
+FORBIDDEN = 'Forbidden'
+
+
+def permanent_error(error):
+    """Ошибка, которую повтор не исправит.
+    Например, чат не найден, бот заблокирован или разметка не разобрана.
+    429, 5xx и сетевые ошибки временные.
+    """
+    code = getattr(error, 'error_code', None)
+    if code is not None:
+        return code in PERMANENT_CODES
+    name = type(error).__name__
+    return name in PERMANENT_ERRORS or (
+        name == 'Unauthorized' and str(error).startswith(FORBIDDEN)
+    )
+
+
+class Outbox:
+    """Кольцевая очередь сообщений (чат, текст).
+    Сообщение удаляется из очереди после успешной отправки, после
+    ошибки, которую повтор не исправит, или после attempts неудачных
+    попыток; в двух последних случаях оно пишется в журнал как
+    потерянное.
+    Если задан spool_path, очередь дублируется в файл-журнал: строка
+    с сообщением при постановке и строка-подтверждение после отправки,
+    так что неотправленное переживает перезапуск процесса. Журнал
+    переписывается только с неотправленными сообщениями, когда очередь
+    пустеет или файл вырастает больше OUTBOX_SPOOL_LIMIT байт.
+    """
+
+    def __init__(self, capacity=OUTBOX_SIZE, spool_path=OUTBOX_SPOOL,
+                 attempts=OUTBOX_ATTEMPTS):
+        """Очередь на capacity сообщений; spool_path - файл сброса."""
+        self.messages = deque()
+        self.capacity = capacity
+        self.attempts = attempts
+        self.tries = {}
+        self.failures = 0
+        self.not_before = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self._next_id = 0
+        self.spool = None
+        self.spool_limit = OUTBOX_SPOOL_LIMIT
+        if spool_path:
+            self._load_spool(spool_path)
+
+    def __len__(self):
+        """Число сообщений в очереди."""
+        return len(self.messages)
+
+    def put(self, chat_id, text):
+        """Ставим сообщение в очередь, не дожидаясь отправки."""
+        with self.lock:
+            if len(self.messages) >= self.capacity:
+                dropped = self.messages.popleft()
+                self.tries.pop(dropped[0], None)
+                metrics.messages_dropped.inc()
+                self._spool_write({'ack': dropped[0]})
+                logger.error('Очередь сообщений переполнена, '
+                             'потеряно сообщение для чата %s', dropped[1])
+            message = (self._next_id, chat_id, text)
+            self._next_id += 1
+            self.messages.append(message)
+            self._spool_write(
+                {'id': message[0], 'chat_id': chat_id, 'text': text}
+            )
+            metrics.outbox_size.set(len(self.messages))
+            self.wakeup.notify()
+
+    def head(self, limit):
+        """Первые сообщения очереди, не больше одного на чат.
+        Следующее сообщение чата попадёт в пачку только после отправки
+        предыдущего, поэтому порядок внутри чата сохраняется.
+        """
+        batch = []
+        chats = set()
+        with self.lock:
+            for message in islice(self.messages, limit * PIPELINE_SCAN):
+                if message[1] not in chats:
+                    chats.add(message[1])
+                    batch.append(message)
+                    if len(batch) == limit:
+                        break
+        return batch
+
+    def done(self, message):
+        """Сообщение отправлено: убираем его из очереди."""
+        self._remove(message)
+        self.failures = 0
+
+    def rejected(self, message, error):
+        """Учитываем неудачную отправку сообщения.
+        Возвращаем True, если сообщение снято с очереди: ошибка
+        постоянная или попытки исчерпаны. Иначе его нужно повторить.
+        """
+        tries = self.tries.get(message[0], 0) + 1
+        if not permanent_error(error) and tries < self.attempts:
+            self.tries[message[0]] = tries
+            return False
+        self._remove(message)
+        metrics.messages_dropped.inc()
+        logger.error('Сообщение для чата %s не отправлено после %s '
+                     'попыток: %s', message[1], tries, error)
+        return True
+
+    def failed(self, error, now=None):
+        """Отправка не удалась: возвращаем паузу до следующей попытки.
+        Если Telegram прислал retry_after, ждём ровно столько.
+        """
+        self.failures += 1
+        metrics.send_failures.inc()
+        delay = getattr(error, 'retry_after', None) or min(
+            MAX_RETRY, MIN_RETRY * 2 ** min(self.failures - 1, 16)
+        )
+        self.not_before = (time.monotonic() if now is None else now) + delay
+        logger.warning('Не удалось отправить сообщение: %s. '
+                       'Повтор через %s с', error, delay)
+        return delay
+
+    def deliver(self, send, send_many=None, pipeline=OUTBOX_PIPELINE):
+        """Отправляем сообщения до опустения очереди или первой ошибки.
+        С send_many сообщения разным чатам уходят пачками до pipeline
+        штук: send_many получает список (чат, текст) и возвращает
+        результат или исключение для каждого сообщения.
+        Возвращаем паузу до следующей попытки или None.
+        """
+        delay = self.not_before - time.monotonic()
+        if delay > 0:
+            return delay
+        while True:
+            batch = self.head(1 if send_many is None else pipeline)
+            if not batch:
+                return None
+            delay = self.settle(batch, _send_batch(batch, send, send_many))
+            if delay is not None:
+                return delay
+
+    def settle(self, batch, results):
+        """Разбираем результаты отправки пачки сообщений.
+        Отправленные и отклонённые насовсем снимаем с очереди. Если
+        хоть одна ошибка временная, возвращаем паузу до повтора.
+        """
+        error = None
+        for message, result in zip(batch, results):
+            if not isinstance(result, Exception):
+                self.done(message)
+            elif not self.rejected(message, result):
+                error = error or result
+        return None if error is None else self.failed(error)
+
+    def run(self, send, stop, send_many=None):
+        """Цикл фонового потока: отправляем, пока не выставлен stop."""
+        while not stop.is_set():
+            delay = self.deliver(send, send_many)
+            with self.lock:
+                if stop.is_set() or (delay is None and self.messages):
+                    continue
+                self.wakeup.wait(delay)
+
+    def start(self, send, send_many=None):
+        """Запускаем фоновый поток отправки; возвращаем событие остановки."""
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self.run, args=(send, stop, send_many), name='outbox',
+            daemon=True
+        )
+        thread.start()
+        return stop, thread
+
+    def shutdown(self, stop, thread, timeout=None):
+        """Останавливаем фоновый поток отправки."""
+        with self.lock:
+            stop.set()
+            self.wakeup.notify()
+        thread.join(timeout)
+
+    def close(self):
+        """Закрываем файл-журнал."""
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
+
+    def _remove(self, message):
+        with self.lock:
+            if self.messages and self.messages[0] is message:
+                self.messages.popleft()
+            elif message in self.messages:
+                self.messages.remove(message)
+            self.tries.pop(message[0], None)
+            metrics.outbox_size.set(len(self.messages))
+            self._spool_write({'ack': message[0]})
+
+    def _spool_write(self, record):
+        if self.spool is None:
+            return
+        self.spool.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.spool.flush()
+        if not self.messages or self.spool.tell() > self.spool_limit:
+            self._compact(self.spool.name)
+
+    def _compact(self, path):
+        if self.spool is not None:
+            self.spool.close()
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+            for number, chat_id, text in self.messages:
+                file.write(json.dumps(
+                    {'id': number, 'chat_id': chat_id, 'text': text},
+                    ensure_ascii=False
+                ) + '\n')
+        os.replace(f'{path}.tmp', path)
+        self.spool = open(path, 'a', encoding='utf-8')
+        # Очередь может сама занимать больше лимита: не переписываем
+        # журнал на каждой записи.
+        self.spool_limit = max(OUTBOX_SPOOL_LIMIT, 2 * self.spool.tell())
+
+    def _load_spool(self, path):
+        pending = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8', errors='replace') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Строка оборвана, если процесс упал во время записи
+                        logger.warning('Пропущена повреждённая строка '
+                                       'журнала очереди: %r', line)
+                        continue
+                    if 'ack' in record:
+                        pending.pop(record['ack'], None)
+                    else:
+                        pending[record['id']] = record
+        for number, record in enumerate(pending.values()):
+            self.messages.append((number, record['chat_id'], record['text']))
+        self._next_id = len(self.messages)
+        self._compact(path)
+        if self.messages:
+            logger.info('Из журнала восстановлено сообщений: %s',
+                        len(self.messages))
+
+
+def _send_batch(batch, send, send_many):
+    if len(batch) > 1:
+        return send_many([message[1:] for message in batch])
+    try:
+        return [send(batch[0][1], batch[0][2])]
+    except Exception as error:
+        return [error]
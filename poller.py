@@ -0,0 +1,259 @@
+"""Многопользовательский опрос API Практикума в одном процессе."""
+import functools
+import heapq
+import itertools
+import os
+import sys
+import time
+
+import commands
+import metrics
+from alerts import ErrorAlerts
+from batching import MessageBatch
+from botapi import close_bot, create_bot
+from checkpoints import open_checkpoints
+from dedup import DedupCache
+from exceptions import CircuitOpenError, WrongResponseCode
+from history import HistoryStore
+from homework import (RETRY_PERIOD, TELEGRAM_TOKEN, check_response, logger,
+                      deliver_message, deliver_messages, parse_homeworks,
+                      request_homeworks)
+from lifecycle import Lifecycle
+from outbox import Outbox
+from responsecache import ResponseCache
+from scheduling import AdaptiveSchedule
+from sessions import create_session
+from tenants import load_tenants
+from timeouts import CYCLE_BUDGET, TIMEOUT, Deadline
+
+TENANTS_FILE = os.getenv('TENANTS_FILE', 'tenants.json')
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 20))
+
+
+class Poller:
+    """Планировщик запросов к API для всех пользователей реестра.
+    Очередь опросов хранится в куче по времени следующего запроса,
+    первые запросы равномерно распределены по RETRY_PERIOD, а следующие
+    назначаются по адаптивному расписанию каждого пользователя.
+    """
+
+    def __init__(self, tenants, bot, retry_period=RETRY_PERIOD,
+                 session=None, checkpoints=None, outbox=None, loader=None,
+                 history=None, listen_commands=commands.BOT_COMMANDS):
+        """Регистрируем пользователей; опрос запускает run()."""
+        self.bot = bot
+        self.retry_period = retry_period
+        self.loader = loader
+        self.session = session or create_session()
+        self.checkpoints = checkpoints or open_checkpoints()
+        self.history = history or HistoryStore()
+        self.listen_commands = listen_commands
+        self.batch = MessageBatch()
+        self.outbox = outbox or Outbox()
+        self.send = functools.partial(deliver_message, bot)
+        self.send_many = None
+        if hasattr(bot, 'pipeline'):
+            self.send_many = functools.partial(deliver_messages, bot)
+        self.cache = ResponseCache()
+        self.sent = DedupCache(store=self.checkpoints)
+        self.board = commands.StatusBoard()
+        self.alerts = ErrorAlerts(self.outbox.put)
+        self.tenants = {}
+        self.schedules = {}
+        self.queue = []
+        self._order = itertools.count()
+        start = time.monotonic()
+        step = retry_period / max(len(tenants), 1)
+        for index, tenant in enumerate(tenants):
+            self.add(tenant, start + index * step)
+
+    def add(self, tenant, due):
+        """Добавляем пользователя и назначаем его первый опрос."""
+        tenant.current_date = (
+            self.checkpoints.load(tenant.name)
+            or tenant.current_date
+            or int(time.time())
+        )
+        self.tenants[tenant.name] = tenant
+        self.schedules[tenant.name] = AdaptiveSchedule(self.retry_period)
+        self.schedule(tenant, due)
+
+    def reload(self, tenants):
+        """Применяем новый реестр пользователей без перезапуска.
+        Сессия, кэши и очередь сообщений сохраняются; у оставшихся
+        пользователей обновляются токен и чат, новые опрашиваются сразу.
+        Метки ушедших сохраняются, а для пришедших метка и отправленные
+        уведомления читаются из общего хранилища: пользователя мог
+        опрашивать другой процесс.
+        """
+        fresh = {tenant.name: tenant for tenant in tenants}
+        for name in set(self.tenants) - set(fresh):
+            del self.tenants[name]
+            del self.schedules[name]
+        self.checkpoints.commit()
+        now = time.monotonic()
+        for name, tenant in fresh.items():
+            current = self.tenants.get(name)
+            if current is None:
+                self.sent.refresh(tenant.chat_id)
+                self.add(tenant, now)
+            else:
+                current.token = tenant.token
+                current.chat_id = tenant.chat_id
+                current.locale = tenant.locale
+        logger.info('Реестр перечитан, пользователей: %s', len(self.tenants))
+
+    def schedule(self, tenant, due):
+        """Ставим опрос пользователя в очередь на момент due."""
+        heapq.heappush(self.queue, (due, next(self._order), tenant))
+
+    def poll(self, tenant, timeout=TIMEOUT):
+        """Опрашиваем API для одного пользователя.
+        Пока новых статусов нет, from_date не сдвигается: запрос остаётся
+        тем же, и неизменившийся ответ приходит как 304 без тела.
+        """
+        response = request_homeworks(
+            tenant.current_date, tenant.headers, self.session, self.cache,
+            timeout
+        )
+        if response is None:
+            self.schedules[tenant.name].success([])
+            self.board.touch(tenant.chat_id)
+            logger.debug('Ответ API не изменился у %s', tenant.name)
+            return
+        response = check_response(response)
+        self.schedules[tenant.name].success(response.homeworks)
+        self.board.update(tenant.chat_id, response.homeworks)
+        homeworks = self.sent.filter(tenant.chat_id, response.homeworks)
+        if homeworks:
+            self.history.record_all(tenant.name, homeworks)
+            for message in parse_homeworks(homeworks, tenant.locale):
+                self.batch.add(tenant.chat_id, message)
+        else:
+            logger.debug('Новых статусов нет у %s', tenant.name)
+        if response.homeworks:
+            tenant.current_date = response.current_date
+            self.checkpoints.stage(tenant.name, tenant.current_date)
+
+    def run_due(self, now=None, budget=None):
+        """Опрашиваем всех пользователей, чей срок уже наступил.
+        Цикл ограничен сроком budget (по умолчанию CYCLE_BUDGET секунд):
+        таймаут каждого запроса урезается до остатка срока, а когда срок
+        истёк, оставшиеся опросы откладываются до следующего прохода,
+        чтобы накопленные уведомления ушли без задержки.
+        """
+        if now is None:
+            now = time.monotonic()
+        if budget is None:
+            budget = Deadline(CYCLE_BUDGET)
+        ready = []
+        while self.queue and self.queue[0][0] <= now:
+            due, order, tenant = heapq.heappop(self.queue)
+            if self.tenants.get(tenant.name) is tenant:
+                ready.append((due, order, tenant))
+        polled = 0
+        for entry in ready:
+            due, _, tenant = entry
+            if budget.expired:
+                heapq.heappush(self.queue, entry)
+                continue
+            polled += 1
+            self.poll_due(tenant, due, budget.timeout())
+        if polled < len(ready):
+            logger.warning(
+                'Срок цикла истёк, отложено опросов: %s', len(ready) - polled
+            )
+        self.flush()
+        self.checkpoints.commit()
+        self.history.commit()
+        return polled
+
+    def poll_due(self, tenant, due, timeout=TIMEOUT):
+        """Опрашиваем пользователя и назначаем его следующий опрос."""
+        metrics.loop_lag.observe(max(0, time.monotonic() - due))
+        try:
+            self.poll(tenant, timeout)
+            self.alerts.recovered(tenant.chat_id)
+        except CircuitOpenError as error:
+            logger.debug('Опрос %s пропущен: %s', tenant.name, error)
+        except Exception as error:
+            if isinstance(error, WrongResponseCode):
+                self.schedules[tenant.name].failure()
+            logger.exception(
+                'Сбой при опросе пользователя %s: %s', tenant.name, error
+            )
+            self.alerts.failure(tenant.chat_id, error)
+        finally:
+            delay = self.schedules[tenant.name].next_delay()
+            self.schedule(tenant, due + delay)
+
+    def flush(self):
+        """Ставим накопленные уведомления в очередь, по одному на чат."""
+        for chat_id, text in self.batch.drain():
+            self.outbox.put(chat_id, text)
+
+    def run(self, lifecycle=None):
+        """Цикл опроса с фоновой отправкой сообщений.
+        По сигналу остановки дожидаемся текущей отправки, досылаем
+        очередь и сохраняем метки; по SIGHUP перечитываем реестр.
+        Команды пользователей обслуживаются отдельным потоком.
+        """
+        lifecycle = lifecycle or Lifecycle()
+        stop, thread = self.outbox.start(self.send, self.send_many)
+        listening = None
+        if self.listen_commands:
+            listening = commands.start(
+                self.bot, commands.CommandHandler(self.board), self.send
+            )
+        try:
+            while not lifecycle.stopping:
+                if lifecycle.take_reload() and self.loader:
+                    try:
+                        self.reload(self.loader())
+                    except Exception as error:
+                        logger.exception(
+                            'Не удалось перечитать реестр: %s', error
+                        )
+                self.run_due(budget=Deadline(
+                    CYCLE_BUDGET, cancelled=lambda: lifecycle.stopping
+                ))
+                timeout = None
+                if self.queue:
+                    timeout = max(0, self.queue[0][0] - time.monotonic())
+                lifecycle.wait(timeout)
+        finally:
+            if listening is not None:
+                listening.set()
+            self.flush()
+            self.outbox.shutdown(stop, thread, SHUTDOWN_TIMEOUT)
+            if thread.is_alive():
+                # поток ещё отправляет: повторная отправка из этого потока
+                # взяла бы те же сообщения, остаток сохранит журнал
+                logger.warning('Отправка не завершилась за %s с',
+                               SHUTDOWN_TIMEOUT)
+            else:
+                self.outbox.deliver(self.send, self.send_many)
+            self.outbox.close()
+            self.checkpoints.close()
+            self.history.close()
+            close_bot(self.bot)
+            logger.info('Опрос остановлен')
+
+
+def main():
+    """Запускаем опрос всех пользователей из реестра."""
+    if not TELEGRAM_TOKEN:
+        logger.critical('Отсутствует обязательная переменная '
+                        'окружения: TELEGRAM_TOKEN')
+        sys.exit(1)
+    tenants = load_tenants(TENANTS_FILE)
+    logger.info('Загружено пользователей: %s', len(tenants))
+    bot = create_bot(TELEGRAM_TOKEN)
+    metrics.start_server()
+    lifecycle = Lifecycle().install()
+    loader = functools.partial(load_tenants, TENANTS_FILE)
+    Poller(tenants, bot, loader=loader).run(lifecycle)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Ограничение частоты запросов к API Практикума и Telegram."""
+import os
+import threading
+import time
+
+PRACTICUM_RATE = float(os.getenv('PRACTICUM_RATE', 5))
+TELEGRAM_RATE = float(os.getenv('TELEGRAM_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+CATCHUP_RATE = float(os.getenv('CATCHUP_RATE', 0.5))
+MAX_KEYS = 10000
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше capacity."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity=None, now=None):
+        """Полное ведро: rate токенов в секунду, не больше capacity."""
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def reserve(self, at):
+        """Забираем токен и возвращаем момент, когда им можно воспользоваться.
+        Токены могут уходить в минус: так запросы выстраиваются в очередь.
+        """
+        if at > self.updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (at - self.updated) * self.rate
+            )
+            self.updated = at
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return max(at, self.updated)
+        return self.updated - self.tokens / self.rate
+
+    def idle(self, now):
+        """Корзина полностью восстановилась и её можно забыть."""
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class RateLimiter:
+    """Общий лимит на эндпоинт и отдельные лимиты на каждый ключ (чат).
+    Сначала запрос ждёт слота своего ключа и только потом берёт токен
+    общей корзины: отложенный запрос расходует токены того момента,
+    когда он действительно уходит.
+    """
+
+    def __init__(self, rate, key_rate=None, key_capacity=None,
+                 clock=time.monotonic, sleep=time.sleep, capacity=None):
+        """Общий лимит rate и лимит key_rate на каждый ключ."""
+        self.clock = clock
+        self.sleep = sleep
+        self.bucket = TokenBucket(rate, capacity, now=clock())
+        self.key_rate = key_rate
+        self.key_capacity = key_capacity
+        self.keys = {}
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Берём токен общей корзины и возвращаем, сколько секунд ждать."""
+        with self.lock:
+            now = self.clock()
+            return max(0, self.bucket.reserve(now) - now)
+
+    def reserve_key(self, key):
+        """Резервируем слот ключа и возвращаем, сколько секунд ждать.
+        Общую корзину не трогаем: её токен берётся после ожидания.
+        """
+        if key is None or not self.key_rate:
+            return 0
+        with self.lock:
+            now = self.clock()
+            return max(0, self._key_bucket(key, now).reserve(now) - now)
+
+    def acquire(self, key=None):
+        """Ждём, пока запрос можно отправить без превышения лимитов."""
+        delay = self.reserve_key(key)
+        if delay:
+            self.sleep(delay)
+        wait = self.reserve()
+        if wait:
+            self.sleep(wait)
+        return delay + wait
+
+    def _key_bucket(self, key, now):
+        bucket = self.keys.get(key)
+        if bucket is None:
+            if len(self.keys) >= MAX_KEYS:
+                self.keys = {
+                    name: value for name, value in self.keys.items()
+                    if not value.idle(now)
+                }
+            bucket = self.keys[key] = TokenBucket(
+                self.key_rate, self.key_capacity, now
+            )
+        return bucket
+
+
+practicum_limiter = RateLimiter(PRACTICUM_RATE)
+# Без запаса токенов: в любую секунду уходит не больше TELEGRAM_RATE
+telegram_limiter = RateLimiter(TELEGRAM_RATE, TELEGRAM_CHAT_RATE, capacity=1)
+catchup_limiter = RateLimiter(CATCHUP_RATE)
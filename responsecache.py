@@ -0,0 +1,56 @@
+"""Условные запросы к API Практикума по ETag и Last-Modified."""
+import os
+from collections import OrderedDict
+
+CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 10000))
+
+
+class ResponseCache:
+    """Последние тело ответа и валидаторы по каждому запросу.
+    Ключ запроса - заголовок авторизации и from_date: пока новых
+    статусов нет, from_date не меняется и сервер может ответить 304.
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        """Кэш на size последних ответов."""
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+
+    @staticmethod
+    def key(headers, timestamp):
+        """Ключ запроса пользователя с заданной меткой времени."""
+        return headers.get('Authorization'), timestamp
+
+    def conditional_headers(self, key):
+        """Заголовки If-None-Match и If-Modified-Since для запроса."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return {}
+        validators, _ = entry
+        headers = {}
+        if validators.get('ETag'):
+            headers['If-None-Match'] = validators['ETag']
+        if validators.get('Last-Modified'):
+            headers['If-Modified-Since'] = validators['Last-Modified']
+        return headers
+
+    def remember(self, key, response_headers, body):
+        """Сохраняем тело ответа, если сервер прислал валидаторы."""
+        validators = {
+            name: response_headers.get(name)
+            for name in ('ETag', 'Last-Modified')
+            if response_headers.get(name)
+        }
+        if not validators:
+            return
+        self.entries[key] = (validators, body)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def hit(self, key):
+        """Сервер ответил 304: возвращаем сохранённое тело ответа."""
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key][1]
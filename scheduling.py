@@ -0,0 +1,66 @@
+"""Адаптивный интервал между запросами к API Практикума."""
+import os
+import random
+
+REVIEWING_PERIOD = int(os.getenv('REVIEWING_PERIOD', 300))
+IDLE_POLLS = int(os.getenv('IDLE_POLLS', 6))
+IDLE_PERIOD = int(os.getenv('IDLE_PERIOD', 3600))
+MAX_BACKOFF = int(os.getenv('MAX_BACKOFF', 3600))
+JITTER = 0.1
+MAX_DOUBLINGS = 32
+
+
+class AdaptiveSchedule:
+    """Интервал опроса для одного пользователя.
+    Пока работа на ревью, опрашиваем чаще; после IDLE_POLLS пустых
+    ответов интервал удваивается до IDLE_PERIOD; после ошибок запроса
+    растёт экспоненциально до MAX_BACKOFF со случайной добавкой.
+    Без ревью и ошибок интервал равен базовому base.
+    """
+
+    def __init__(self, base, reviewing=REVIEWING_PERIOD,
+                 idle_polls=IDLE_POLLS, idle_period=IDLE_PERIOD,
+                 max_backoff=MAX_BACKOFF):
+        """Расписание с базовым интервалом base секунд."""
+        self.base = base
+        self.reviewing_period = min(reviewing, base)
+        self.idle_polls = idle_polls
+        self.idle_period = max(idle_period, base)
+        self.max_backoff = max(max_backoff, base)
+        self.reviewing = set()
+        self.empty_polls = 0
+        self.failures = 0
+
+    def success(self, homeworks):
+        """Учитываем успешный ответ API."""
+        self.failures = 0
+        if not homeworks:
+            self.empty_polls += 1
+            return
+        self.empty_polls = 0
+        for homework in homeworks:
+            name = homework.get('homework_name')
+            if homework.get('status') == 'reviewing':
+                self.reviewing.add(name)
+            else:
+                self.reviewing.discard(name)
+
+    def failure(self):
+        """Учитываем неудачный запрос к API."""
+        self.failures += 1
+
+    def next_delay(self):
+        """Сколько секунд ждать до следующего запроса."""
+        if self.failures:
+            delay = min(self.max_backoff, self.base * 2 ** min(
+                self.failures - 1, MAX_DOUBLINGS
+            ))
+            return delay + random.uniform(0, delay * JITTER)
+        if self.reviewing:
+            return self.reviewing_period
+        extra = self.empty_polls - self.idle_polls
+        if extra > 0:
+            return min(
+                self.idle_period, self.base * 2 ** min(extra, MAX_DOUBLINGS)
+            )
+        return self.base
@@ -0,0 +1,129 @@
+"""Проверка ответа API Практикума по заранее собранной схеме.
+Схема один раз превращается в кортеж проверок и класс записи
+со __slots__, поэтому проверка ответа - один проход по полям без
+повторных поисков ключей, а результат - лёгкие записи вместо словарей.
+"""
+from exceptions import SchemaError
+from templates import CATALOG
+
+
+class Field:
+    """Поле схемы: имя, допустимые типы и, если нужно, значения."""
+
+    __slots__ = ('name', 'types', 'required', 'choices')
+
+    def __init__(self, name, types, required=True, choices=None):
+        """Поле name с допустимыми типами types."""
+        self.name = name
+        self.types = types if isinstance(types, tuple) else (types,)
+        self.required = required
+        self.choices = frozenset(choices) if choices is not None else None
+
+
+class Record:
+    """Запись с полями из __slots__ подкласса.
+    Метод get повторяет словарный, чтобы запись можно было передать
+    туда, где раньше ожидался словарь работы.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        """Заполняем поля записи в порядке __slots__."""
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def get(self, name, default=None):
+        """Значение поля или default, если поле пустое."""
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+    def __repr__(self):
+        """Запись с именами и значениями полей."""
+        fields = ', '.join(
+            f'{name}={getattr(self, name)!r}' for name in self.__slots__
+        )
+        return f'{type(self).__name__}({fields})'
+
+
+class Schema:
+    """Скомпилированная схема словаря."""
+
+    def __init__(self, record_name, fields):
+        """Компилируем проверки fields и класс записи record_name."""
+        self.names = tuple(field.name for field in fields)
+        self.checks = tuple(
+            (field.name, field.types, field.required, field.choices)
+            for field in fields
+        )
+        self.record = type(record_name, (Record,), {'__slots__': self.names})
+
+    def violations(self, data, path=''):
+        """Список всех нарушений схемы в data."""
+        if not isinstance(data, dict):
+            return [f'{path or "ответ"}: ожидается словарь, '
+                    f'получен {type(data).__name__}']
+        errors = []
+        for name, types, required, choices in self.checks:
+            if name not in data:
+                if required:
+                    errors.append(f'{path}{name}: нет ключа')
+                continue
+            value = data[name]
+            if not isinstance(value, types):
+                if value is not None or required:
+                    errors.append(
+                        f'{path}{name}: неверный тип {type(value).__name__}'
+                    )
+            elif choices is not None and value not in choices:
+                errors.append(f'{path}{name}: неизвестное значение {value}')
+        return errors
+
+    def build(self, data):
+        """Запись из уже проверенного словаря."""
+        return self.record(*map(data.get, self.names))
+
+    def load(self, data, path=''):
+        """Проверяем data и возвращаем запись или SchemaError."""
+        errors = self.violations(data, path)
+        if errors:
+            raise SchemaError(errors)
+        return self.build(data)
+
+
+HOMEWORK = Schema('Homework', (
+    Field('homework_name', str),
+    Field('status', str, choices=CATALOG['ru']['verdicts']),
+    Field('id', int, required=False),
+    Field('date_updated', str, required=False),
+    Field('reviewer_comment', str, required=False),
+    Field('lesson_name', str, required=False),
+))
+RESPONSE = Schema('Response', (
+    Field('homeworks', list),
+    Field('current_date', int),
+))
+
+
+class Checked(Record):
+    """Проверенный ответ API: корректные работы и отклонённые нарушения."""
+
+    __slots__ = ('homeworks', 'current_date', 'rejected')
+
+
+def load_response(data):
+    """Проверяем ответ API целиком.
+    Нарушения в самом ответе поднимают SchemaError. Некорректные работы
+    отбрасываются, а их нарушения собираются в поле rejected записи,
+    чтобы одна испорченная работа не задерживала остальные.
+    """
+    response = RESPONSE.load(data)
+    homeworks = []
+    rejected = []
+    for index, item in enumerate(response.homeworks):
+        errors = HOMEWORK.violations(item, f'homeworks[{index}].')
+        if errors:
+            rejected.extend(errors)
+        else:
+            homeworks.append(HOMEWORK.build(item))
+    return Checked(homeworks, response.current_date, rejected)
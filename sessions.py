@@ -0,0 +1,37 @@
+"""Пул HTTP-соединений к API Практикума."""
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from timeouts import TIMEOUT
+
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+
+
+class PooledSession(requests.Session):
+    """Сессия с постоянными соединениями и таймаутом по умолчанию."""
+
+    def __init__(self, timeout=TIMEOUT):
+        """Сессия с таймаутом timeout для запросов без своего."""
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        """Подставляем таймаут, если он не передан явно."""
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(pool_size=POOL_SIZE, headers=None, timeout=TIMEOUT):
+    """Создаём сессию с пулом keep-alive соединений.
+    Заголовки headers добавляются ко всем запросам сессии.
+    """
+    session = PooledSession(timeout=timeout)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    if headers:
+        session.headers.update(headers)
+    return session
@@ -0,0 +1,242 @@
+"""Распределение пользователей между процессами и хостами.
+Пользователи раскладываются по воркерам согласованным хешированием:
+при добавлении или уходе воркера переезжает только его доля реестра.
+Локально воркеры запускает и перебалансирует Coordinator, на нескольких
+хостах каждый воркер получает свой номер через SHARD_ID и SHARD_COUNT.
+"""
+import bisect
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+import metrics
+from botapi import create_bot
+from homework import TELEGRAM_TOKEN, logger
+from lifecycle import Lifecycle
+from outbox import OUTBOX_SPOOL, Outbox
+from poller import SHUTDOWN_TIMEOUT, TENANTS_FILE, Poller
+from tenants import load_tenants
+
+SHARD_ID = os.getenv('SHARD_ID')
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 1))
+WORKERS = int(os.getenv('WORKERS', os.cpu_count() or 1))
+SHARD_STATE = os.getenv('SHARD_STATE', 'shards.json')
+REPLICAS = 100
+CHECK_INTERVAL = 1
+RESTART_DELAY = float(os.getenv('RESTART_DELAY', 5))
+
+
+def _point(value):
+    digest = hashlib.md5(str(value).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class HashRing:
+    """Кольцо согласованного хеширования.
+    Каждый воркер занимает replicas точек на кольце; пользователь
+    принадлежит воркеру с ближайшей точкой по часовой стрелке.
+    Хеш не зависит от PYTHONHASHSEED, поэтому все процессы и хосты
+    получают одинаковое распределение.
+    """
+
+    def __init__(self, members=(), replicas=REPLICAS):
+        """Кольцо с replicas точками на каждого воркера members."""
+        self.replicas = replicas
+        self.points = []
+        self.owners = {}
+        for member in members:
+            self.add(member)
+
+    def __len__(self):
+        """Число воркеров на кольце."""
+        return len(set(self.owners.values()))
+
+    def add(self, member):
+        """Добавляем воркера на кольцо."""
+        for replica in range(self.replicas):
+            point = _point(f'{member}:{replica}')
+            if point not in self.owners:
+                bisect.insort(self.points, point)
+                self.owners[point] = member
+
+    def remove(self, member):
+        """Убираем воркера с кольца."""
+        self.owners = {
+            point: owner for point, owner in self.owners.items()
+            if owner != member
+        }
+        self.points = sorted(self.owners)
+
+    def owner(self, key):
+        """Воркер, которому принадлежит ключ."""
+        if not self.points:
+            raise LookupError('На кольце нет ни одного воркера')
+        index = bisect.bisect(self.points, _point(key)) % len(self.points)
+        return self.owners[self.points[index]]
+
+
+def shard_tenants(tenants, members, member):
+    """Пользователи, которые достаются воркеру member."""
+    ring = HashRing(members)
+    return [tenant for tenant in tenants if ring.owner(tenant.name) == member]
+
+
+def read_members(path=SHARD_STATE):
+    """Текущий состав воркеров, записанный координатором."""
+    with open(path, encoding='utf-8') as state:
+        return json.load(state)['members']
+
+
+def write_members(members, path=SHARD_STATE):
+    """Атомарно записываем состав воркеров."""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as state:
+        json.dump({'members': sorted(members)}, state)
+    os.replace(tmp, path)
+
+
+def load_shard(member, members=None, path=TENANTS_FILE,
+               state_path=SHARD_STATE):
+    """Загрузчик реестра воркера: его доля пользователей.
+    Без явного members состав воркеров читается из state_path,
+    поэтому SIGHUP от координатора применяет новое распределение.
+    """
+    if members is None:
+        members = read_members(state_path)
+    tenants = shard_tenants(load_tenants(path), members, member)
+    logger.info('Воркер %s: пользователей %s', member, len(tenants))
+    return tenants
+
+
+def run_worker(member, members=None, state_path=SHARD_STATE):
+    """Опрашиваем долю пользователей одного воркера.
+    У каждого воркера своя копия очереди сообщений на диске и свой
+    порт метрик; метки времени общие, поэтому пользователь, переехавший
+    к другому воркеру, продолжает опрос с сохранённой метки.
+    Команды воркеры не слушают: getUpdates с одним токеном доступен
+    только одному процессу, а каждый воркер знает лишь свою долю.
+    """
+    lifecycle = Lifecycle().install()
+    loader = functools.partial(
+        load_shard, member, members, state_path=state_path
+    )
+    bot = create_bot(TELEGRAM_TOKEN)
+    spool = f'{OUTBOX_SPOOL}.{member}' if OUTBOX_SPOOL else ''
+    if metrics.METRICS_PORT:
+        metrics.start_server(int(metrics.METRICS_PORT) + int(member) + 1)
+    Poller(
+        loader(), bot, loader=loader, outbox=Outbox(spool_path=spool),
+        listen_commands=False
+    ).run(lifecycle)
+
+
+class Coordinator:
+    """Запускает воркеров в отдельных процессах и следит за ними.
+    Когда воркер завершается, он уходит с кольца и его доля сразу
+    раздаётся остальным; через RESTART_DELAY воркер перезапускается
+    и возвращается на кольцо. Состав записывается в state_path,
+    а работающие воркеры узнают о нём по сигналу SIGHUP.
+    """
+
+    def __init__(self, workers=WORKERS, state_path=SHARD_STATE):
+        """Супервизор для workers воркеров; state_path - база меток."""
+        self.workers = workers
+        self.state_path = state_path
+        self.context = multiprocessing.get_context('spawn')
+        self.processes = {}
+        self.restarts = {}
+
+    def members(self):
+        """Воркеры на кольце: запущенные и не ожидающие перезапуска."""
+        return [
+            member for member, process in self.processes.items()
+            if process.is_alive() and member not in self.restarts
+        ]
+
+    def spawn(self, member):
+        """Запускаем процесс воркера; состав он прочитает при старте.
+        До установки своих обработчиков воркер игнорирует SIGHUP,
+        иначе ранний сигнал о перебалансировке завершил бы его.
+        """
+        process = self.context.Process(
+            target=run_worker, args=(member, None, self.state_path),
+            name=f'shard-{member}'
+        )
+        previous = signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        try:
+            process.start()
+        finally:
+            signal.signal(signal.SIGHUP, previous)
+        self.processes[member] = process
+
+    def rebalance(self, joined=()):
+        """Публикуем состав и просим остальных воркеров его применить."""
+        members = self.members()
+        write_members(members + list(joined), self.state_path)
+        for member in members:
+            os.kill(self.processes[member].pid, signal.SIGHUP)
+        logger.info(
+            'Распределение обновлено, воркеров: %s',
+            len(members) + len(joined)
+        )
+
+    def check(self, now=None):
+        """Выводим упавших воркеров с кольца и перезапускаем их."""
+        now = time.monotonic() if now is None else now
+        left = False
+        for member, process in self.processes.items():
+            if not process.is_alive() and member not in self.restarts:
+                logger.error(
+                    'Воркер %s завершился с кодом %s',
+                    member, process.exitcode
+                )
+                self.restarts[member] = now + RESTART_DELAY
+                left = True
+        if left:
+            self.rebalance()
+        for member, due in list(self.restarts.items()):
+            if due <= now:
+                del self.restarts[member]
+                self.rebalance(joined=[member])
+                self.spawn(member)
+
+    def run(self, lifecycle):
+        """Работаем до сигнала остановки, затем останавливаем воркеров."""
+        write_members(range(self.workers), self.state_path)
+        for member in range(self.workers):
+            self.spawn(member)
+        try:
+            while not lifecycle.stopping:
+                lifecycle.wait(CHECK_INTERVAL)
+                if lifecycle.take_reload():
+                    self.rebalance()
+                self.check()
+        finally:
+            for process in self.processes.values():
+                if process.is_alive():
+                    process.terminate()
+            deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+            for process in self.processes.values():
+                process.join(max(0, deadline - time.monotonic()))
+            logger.info('Воркеры остановлены')
+
+
+def main():
+    """Запускаем координатора или один воркер из SHARD_ID."""
+    if not TELEGRAM_TOKEN:
+        logger.critical('Отсутствует обязательная переменная '
+                        'окружения: TELEGRAM_TOKEN')
+        sys.exit(1)
+    if SHARD_ID is not None:
+        run_worker(int(SHARD_ID), range(SHARD_COUNT))
+        return
+    Coordinator().run(Lifecycle().install())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Шаблоны уведомлений о статусе работы на нескольких языках.
+Шаблоны собираются один раз при импорте: неизменяемые части уже
+экранированы под выбранную разметку, и при отправке остаётся только
+подставить название работы и, если нужно, комментарий ревьюера.
+"""
+import html
+import os
+import re
+
+DEFAULT_LOCALE = os.getenv('MESSAGE_LOCALE', 'ru')
+MESSAGE_FORMAT = os.getenv('MESSAGE_FORMAT', 'text')
+REVIEWER_COMMENTS = os.getenv('REVIEWER_COMMENTS', '') == '1'
+
+CATALOG = {
+    'ru': {
+        'changed': 'Изменился статус проверки работы "{name}". {verdict}',
+        'comment': 'Комментарий ревьюера: {comment}',
+        'verdicts': {
+            'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
+            'reviewing': 'Работа взята на проверку ревьюером.',
+            'rejected': 'Работа проверена: у ревьюера есть замечания.'
+        },
+    },
+    'en': {
+        'changed': 'Review status of "{name}" has changed. {verdict}',
+        'comment': 'Reviewer comment: {comment}',
+        'verdicts': {
+            'approved': 'The reviewer approved your work. Hooray!',
+            'reviewing': 'The reviewer has started reviewing your work.',
+            'rejected': 'The reviewer has left some remarks.'
+        },
+    },
+}
+
+MARKDOWN_SPECIAL = re.compile(r'([_*\[\]()~`>#+\-=|{}.!\\])')
+
+
+def escape_markdown(text):
+    """Экранируем текст для MarkdownV2."""
+    return MARKDOWN_SPECIAL.sub(r'\\\1', text)
+
+
+FORMATS = {
+    'text': (None, str, ('', '')),
+    'html': ('HTML', html.escape, ('<b>', '</b>')),
+    'markdown': ('MarkdownV2', escape_markdown, ('*', '*')),
+}
+PARSE_MODE, ESCAPE, _ = FORMATS[MESSAGE_FORMAT]
+
+
+def compile_templates(message_format=MESSAGE_FORMAT, catalog=CATALOG):
+    """Собираем шаблоны для всех языков и статусов.
+    Для пары (язык, статус) храним начало и конец сообщения, между
+    которыми вставляется название работы, и такую же пару вокруг
+    комментария ревьюера.
+    """
+    _, escape, (bold, unbold) = FORMATS[message_format]
+    compiled = {}
+    for locale, phrases in catalog.items():
+        head, tail = phrases['changed'].split('{name}')
+        before, after = tail.split('{verdict}')
+        comment_head, comment_tail = phrases['comment'].split('{comment}')
+        comment = ('\n' + escape(comment_head), escape(comment_tail))
+        for status, verdict in phrases['verdicts'].items():
+            compiled[locale, status] = (
+                escape(head) + bold,
+                unbold + escape(before) + escape(verdict) + escape(after),
+                comment,
+            )
+    return compiled
+
+
+TEMPLATES = compile_templates()
+
+
+def render(homework, locale=DEFAULT_LOCALE, comments=REVIEWER_COMMENTS):
+    """Текст уведомления о статусе работы.
+    homework - запись schema.HOMEWORK, статус в ней уже проверен.
+    Для неизвестного языка используется язык по умолчанию.
+    """
+    template = (
+        TEMPLATES.get((locale, homework.status))
+        or TEMPLATES[DEFAULT_LOCALE, homework.status]
+    )
+    head, tail, (comment_head, comment_tail) = template
+    message = head + ESCAPE(homework.homework_name) + tail
+    if comments and homework.reviewer_comment:
+        message += (
+            comment_head + ESCAPE(homework.reviewer_comment) + comment_tail
+        )
+    return message
@@ -0,0 +1,55 @@
+"""Реестр пользователей бота для многопользовательского режима."""
+import json
+
+from templates import DEFAULT_LOCALE
+
+
+class Tenant:
+    """Пользователь: токен Практикума, чат и последняя метка времени."""
+
+    __slots__ = ('name', 'token', 'chat_id', 'current_date', 'locale')
+
+    def __init__(self, token, chat_id, current_date=None, name=None,
+                 locale=DEFAULT_LOCALE):
+        """Пользователь с токеном Практикума и чатом для уведомлений."""
+        self.token = token
+        self.chat_id = chat_id
+        self.current_date = current_date
+        self.name = name or str(chat_id)
+        self.locale = locale
+
+    @property
+    def headers(self):
+        """Заголовки авторизации для запроса к API Практикума."""
+        return {'Authorization': f'OAuth {self.token}'}
+
+    def __repr__(self):
+        """Имя пользователя без токена, чтобы он не попал в журнал."""
+        return f'Tenant({self.name!r})'
+
+
+def load_tenants(path):
+    """Загружаем реестр пользователей из JSON-файла.
+    Файл содержит список объектов с ключами practicum_token, chat_id
+    и необязательными current_date, name и locale.
+    """
+    with open(path, encoding='utf-8') as file:
+        records = json.load(file)
+    if not isinstance(records, list):
+        raise TypeError('Реестр пользователей должен быть списком')
+    tenants = []
+    for record in records:
+        for key in ('practicum_token', 'chat_id'):
+            if key not in record:
+                raise KeyError(f'В реестре пользователей нет ключа {key}')
+        tenants.append(Tenant(
+            record['practicum_token'],
+            record['chat_id'],
+            record.get('current_date'),
+            record.get('name'),
+            record.get('locale', DEFAULT_LOCALE),
+        ))
+    names = [tenant.name for tenant in tenants]
+    if len(names) != len(set(names)):
+        raise ValueError('В реестре пользователей повторяются имена')
+    return tenants
@@ -0,0 +1,244 @@
+import asyncio
+
+import pytest
+
+from benchmarks import fakes
+
+UNLIMITED = 1e9
+
+
+@pytest.fixture
+def servers(monkeypatch):
+    import aio
+    import breaker
+    import ratelimit
+    practicum = fakes.start(fakes.PracticumHandler)
+    telegram_server = fakes.start(fakes.TelegramHandler)
+    limiter = ratelimit.RateLimiter(UNLIMITED, UNLIMITED)
+    monkeypatch.setattr(aio, 'practicum_limiter', limiter)
+    monkeypatch.setattr(aio, 'telegram_limiter', limiter)
+    monkeypatch.setattr(
+        aio, 'practicum_breaker', breaker.CircuitBreaker(name='test')
+    )
+    monkeypatch.setattr(
+        aio, 'ENDPOINT', f'{practicum.url}/api/user_api/homework_statuses/'
+    )
+    monkeypatch.setattr(
+        aio, 'TELEGRAM_API', f'{telegram_server.url}/bot{{token}}/{{method}}'
+    )
+    yield practicum, telegram_server
+    practicum.shutdown()
+    telegram_server.shutdown()
+
+
+async def wait_for(condition, timeout=5):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, 'Условие не выполнилось вовремя.'
+        await asyncio.sleep(0.01)
+
+
+def make_engine(tenants, loader=None):
+    import aio
+    import checkpoints
+    import history
+    return aio.AsyncPoller(
+        tenants, session=None,
+        checkpoints=checkpoints.MemoryCheckpointStore(),
+        loader=loader, history=history.HistoryStore('')
+    )
+
+
+class TestAsyncPoller:
+
+    def test_get_api_answer_and_server_error(self, servers):
+        import aio
+        from exceptions import WrongResponseCode
+        practicum, _ = servers
+
+        async def scenario():
+            async with aio.create_session() as session:
+                answer = await aio.get_api_answer(
+                    session, 0, {'Authorization': 'OAuth token'}
+                )
+                assert len(answer['homeworks']) == 1
+                practicum.config['error_rate'] = 1
+                with pytest.raises(WrongResponseCode):
+                    await aio.get_api_answer(session, 0, {})
+
+        asyncio.run(scenario())
+
+    def test_deliver_message(self, servers):
+        import aio
+        _, telegram_server = servers
+
+        async def scenario():
+            async with aio.create_session() as session:
+                result = await aio.deliver_message(session, 7, 'Привет')
+            assert result['chat']['id'] == 7
+
+        asyncio.run(scenario())
+        assert telegram_server.messages[0]['text'] == 'Привет'
+
+    def test_run_polls_sends_and_stops(self, servers, monkeypatch):
+        import aio
+        import tenants
+        _, telegram_server = servers
+        monkeypatch.setattr(aio, 'RETRY_PERIOD', 0.01)
+        monkeypatch.setattr(aio.commands, 'BOT_COMMANDS', False)
+
+        async def scenario():
+            async with aio.create_session() as session:
+                engine = make_engine(
+                    [tenants.Tenant('a', 1), tenants.Tenant('b', 2)]
+                )
+                engine.session = session
+                running = asyncio.ensure_future(engine.run())
+                await wait_for(lambda: len(telegram_server.messages) >= 2)
+                engine.stopping.set()
+                await running
+            return engine
+
+        engine = asyncio.run(scenario())
+        chats = {message['chat_id'] for message in telegram_server.messages}
+        assert chats == {1, 2}, (
+            'Каждый пользователь должен получить уведомление в свой чат.'
+        )
+        assert all(task.done() for task in engine.tasks.values())
+        assert engine.checkpoints.load('1') is not None, (
+            'Метки опрошенных пользователей должны сохраняться.'
+        )
+
+    def test_drain_outbox_retries_after_error(self, servers):
+        import aio
+        _, telegram_server = servers
+        telegram_server.config['error_rate'] = 1
+
+        async def scenario():
+            async with aio.create_session() as session:
+                engine = make_engine([])
+                engine.session = session
+                engine.outbox.put(3, 'текст')
+                drain = asyncio.ensure_future(engine.drain_outbox())
+                await wait_for(lambda: engine.outbox.failures > 0)
+                telegram_server.config['error_rate'] = 0
+                engine.outbox.not_before = 0
+                engine.queued.set()
+                await wait_for(lambda: len(engine.outbox) == 0)
+                drain.cancel()
+
+        asyncio.run(scenario())
+        assert [message['text'] for message in telegram_server.messages] == [
+            'текст'
+        ]
+
+    def test_drain_outbox_overlaps_sends_to_different_chats(
+            self, servers, monkeypatch):
+        import time
+
+        import aio
+        import ratelimit
+        _, telegram_server = servers
+        telegram_server.config['latency'] = 0.2
+        monkeypatch.setattr(
+            aio, 'telegram_limiter', ratelimit.RateLimiter(UNLIMITED, 1)
+        )
+
+        async def scenario():
+            async with aio.create_session() as session:
+                engine = make_engine([])
+                engine.session = session
+                for chat_id in (1, 1, 2, 3, 4, 5):
+                    engine.outbox.put(chat_id, f'для {chat_id}')
+                start = time.monotonic()
+                drain = asyncio.ensure_future(engine.drain_outbox())
+                await wait_for(lambda: len(telegram_server.messages) >= 5)
+                elapsed = time.monotonic() - start
+                await wait_for(lambda: len(engine.outbox) == 0)
+                drain.cancel()
+            return elapsed
+
+        elapsed = asyncio.run(scenario())
+        assert elapsed < 0.6, (
+            'Сообщения разным чатам должны отправляться одновременно.'
+        )
+        assert telegram_server.messages[-1]['chat_id'] == 1, (
+            'Второе сообщение чата не должно задерживать остальные чаты.'
+        )
+
+    def test_listen_commands_answers_status(self, servers, monkeypatch):
+        import aio
+        _, telegram_server = servers
+        monkeypatch.setattr(aio.commands, 'UPDATES_TIMEOUT', 0.1)
+        telegram_server.updates = [
+            {'update_id': 10,
+             'message': {'text': '/status', 'chat': {'id': 5}}}
+        ]
+
+        async def scenario():
+            async with aio.create_session() as session:
+                engine = make_engine([])
+                engine.session = session
+                engine.board.update(
+                    5, [{'homework_name': 'hw', 'status': 'approved'}]
+                )
+                listen = asyncio.ensure_future(engine.listen_commands('t'))
+                await wait_for(lambda: telegram_server.messages)
+                listen.cancel()
+
+        asyncio.run(scenario())
+        reply = telegram_server.messages[0]
+        assert reply['chat_id'] == 5 and '"hw"' in reply['text']
+
+    def test_listen_commands_backs_off_on_api_error(self, monkeypatch):
+        import aio
+
+        class ConflictHandler(fakes.TelegramHandler):
+            def do_GET(self):
+                self.server.requests += 1
+                self.reply(409, {
+                    'ok': False, 'error_code': 409,
+                    'description': 'Conflict: terminated by other getUpdates'
+                })
+
+        server = fakes.start(ConflictHandler)
+        monkeypatch.setattr(
+            aio, 'TELEGRAM_API', f'{server.url}/bot{{token}}/{{method}}'
+        )
+        monkeypatch.setattr(aio.commands, 'UPDATES_TIMEOUT', 1)
+
+        async def scenario():
+            async with aio.create_session() as session:
+                engine = make_engine([])
+                engine.session = session
+                listen = asyncio.ensure_future(engine.listen_commands('t'))
+                await asyncio.sleep(0.5)
+                listen.cancel()
+
+        asyncio.run(scenario())
+        server.shutdown()
+        assert 1 <= server.requests <= 6, (
+            'После ошибки getUpdates нужно выждать паузу, а не повторять '
+            'запрос сразу.'
+        )
+
+    def test_reload_starts_new_and_cancels_removed(self):
+        import tenants
+        registry = [tenants.Tenant('a', 1), tenants.Tenant('b', 2)]
+
+        async def scenario():
+            engine = make_engine(registry, loader=lambda: registry)
+            for tenant in list(engine.tenants.values()):
+                engine.start(tenant, delay=60)
+            removed = engine.tasks['2']
+            registry[:] = [tenants.Tenant('new', 1), tenants.Tenant('c', 3)]
+            engine.reload()
+            await asyncio.sleep(0)
+            assert removed.cancelled()
+            assert set(engine.tasks) == {'1', '3'}
+            assert engine.tenants['1'].token == 'new'
+            engine.stopping.set()
+            await asyncio.wait(list(engine.tasks.values()))
+
+        asyncio.run(scenario())
@@ -0,0 +1,136 @@
+import pytest
+
+
+class FakeResponse:
+
+    def __init__(self, answer):
+        self.answer = answer
+
+    def json(self):
+        return self.answer
+
+
+class FakeSession:
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = []
+        self.closed = False
+
+    def post(self, url, json=None, **kwargs):
+        self.calls.append((url, json, kwargs))
+        return FakeResponse(self.answers.pop(0))
+
+    def close(self):
+        self.closed = True
+
+
+class TestBotClient:
+
+    def test_send_message_posts_to_bot_api(self):
+        import botapi
+        session = FakeSession({'ok': True, 'result': {'message_id': 1}})
+        bot = botapi.BotClient('token', session=session)
+        assert bot.send_message(42, 'Привет', parse_mode='HTML') == {
+            'message_id': 1
+        }
+        url, payload, kwargs = session.calls[0]
+        assert url == 'https://api.telegram.org/bottoken/sendMessage'
+        assert payload == {
+            'chat_id': 42, 'text': 'Привет', 'parse_mode': 'HTML'
+        }
+        assert kwargs == {}, (
+            'Без явного таймаута должен действовать таймаут сессии.'
+        )
+
+    def test_api_error_carries_retry_after(self):
+        import botapi
+        from exceptions import TelegramAPIError
+        session = FakeSession({
+            'ok': False, 'error_code': 429,
+            'description': 'Too Many Requests',
+            'parameters': {'retry_after': 7},
+        })
+        bot = botapi.BotClient('token', session=session)
+        with pytest.raises(TelegramAPIError) as error:
+            bot.send_message(42, 'Привет')
+        assert error.value.retry_after == 7
+        assert str(error.value) == 'Too Many Requests'
+
+    def test_get_updates_extends_read_timeout(self):
+        import botapi
+        update = {'update_id': 5, 'message': {'text': '/status'}}
+        session = FakeSession({'ok': True, 'result': [update]})
+        bot = botapi.BotClient('token', session=session)
+        updates = bot.get_updates(offset=4, timeout=25)
+        assert [item.update_id for item in updates] == [5]
+        assert updates[0].to_dict() == update
+        _, payload, kwargs = session.calls[0]
+        assert payload == {'offset': 4, 'timeout': 25}
+        connect, read = botapi.TIMEOUT
+        assert kwargs['timeout'] == (connect, read + 25), (
+            'Таймаут чтения должен превышать время long polling.'
+        )
+
+    def test_pipeline_returns_errors_in_place(self):
+        import botapi
+        session = FakeSession()
+        bot = botapi.BotClient('token', session=session, pool_size=2)
+
+        def fail():
+            raise ValueError('сбой')
+
+        results = bot.pipeline([lambda: 1, fail, lambda: 3])
+        assert results[0] == 1 and results[2] == 3
+        assert isinstance(results[1], ValueError)
+        bot.close()
+        assert session.closed and bot.executor is None
+
+    def test_default_client_is_builtin(self):
+        import botapi
+        bot = botapi.create_bot('token')
+        assert isinstance(bot, botapi.BotClient)
+        bot.close()
+
+
+class TestOutboxPipeline:
+
+    def test_head_takes_one_message_per_chat(self):
+        import outbox
+        box = outbox.Outbox(spool_path='')
+        for chat_id, text in ((1, 'a'), (1, 'b'), (2, 'c'), (3, 'd')):
+            box.put(chat_id, text)
+        assert [message[1:] for message in box.head(10)] == [
+            (1, 'a'), (2, 'c'), (3, 'd')
+        ]
+        assert len(box.head(2)) == 2
+
+    def test_send_many_keeps_order_within_chat(self):
+        import outbox
+        box = outbox.Outbox(spool_path='')
+        for chat_id, text in ((1, 'a'), (1, 'b'), (2, 'c'), (2, 'd')):
+            box.put(chat_id, text)
+        batches = []
+
+        def send_many(messages):
+            batches.append(messages)
+            return [None] * len(messages)
+
+        assert box.deliver(None, send_many) is None
+        assert batches == [[(1, 'a'), (2, 'c')], [(1, 'b'), (2, 'd')]]
+        assert len(box) == 0
+
+    def test_failed_message_stays_queued(self):
+        import outbox
+        box = outbox.Outbox(spool_path='')
+        box.put(1, 'a')
+        box.put(2, 'b')
+
+        def send_many(messages):
+            return [None, ConnectionError('сеть недоступна')]
+
+        assert box.deliver(None, send_many) > 0
+        assert [message[1:] for message in box.messages] == [(2, 'b')], (
+            'Неотправленное сообщение должно остаться в очереди, '
+            'отправленное - уйти из неё.'
+        )
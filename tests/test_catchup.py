@@ -0,0 +1,174 @@
+from schema import Checked
+
+
+def homework(name, status, date):
+    return {
+        'homework_name': name, 'status': status,
+        'date_updated': f'2026-01-{date:02d}T10:00:00Z',
+    }
+
+
+def timestamp(date):
+    import history
+    return history.changed_at(homework('', '', date))
+
+
+class TestCatchUp:
+
+    def test_chronological_keeps_undated_last(self):
+        import catchup
+        undated = {'homework_name': 'hw0', 'status': 'approved'}
+        homeworks = [homework('hw3', 'approved', 3), undated,
+                     homework('hw1', 'reviewing', 1)]
+        assert catchup.chronological(homeworks) == [
+            homeworks[2], homeworks[0], undated
+        ]
+
+    def test_backlog_is_fetched_page_by_page(self):
+        import catchup
+        history = [homework(f'hw{date}', 'approved', date)
+                   for date in range(1, 6)]
+        requested = []
+
+        def fetch(from_date):
+            requested.append(from_date)
+            page = [item for item in history
+                    if timestamp(int(item['date_updated'][8:10])) >= from_date]
+            return Checked(list(reversed(page[:2])), from_date + 1, [])
+
+        homeworks, current_date = catchup.fetch_backlog(
+            fetch, timestamp(1), page=2
+        )
+        assert [item['homework_name'] for item in homeworks] == [
+            'hw1', 'hw2', 'hw3', 'hw4', 'hw5'
+        ], 'Пропущенные работы должны прийти полностью и по времени.'
+        assert requested == [timestamp(date) for date in range(1, 6)], (
+            'Следующая страница должна начинаться с последнего '
+            'date_updated предыдущей.'
+        )
+        assert current_date == timestamp(5) + 1
+
+    def test_needs_catch_up_after_long_downtime(self):
+        import catchup
+        assert not catchup.needs_catch_up(None, now=10 ** 9)
+        assert not catchup.needs_catch_up(1000, now=1500, after=600)
+        assert catchup.needs_catch_up(1000, now=2000, after=600)
+
+    def test_backlog_is_sent_in_order_and_rate_limited(
+            self, monkeypatch, homework_module):
+        import checkpoints
+        import dedup
+        import history
+        import ratelimit
+        sent = []
+        delays = []
+        clock = [0]
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append(text)
+
+        def sleep(delay):
+            delays.append(delay)
+            clock[0] += delay
+
+        limiter = ratelimit.RateLimiter(
+            0.5, clock=lambda: clock[0], sleep=sleep
+        )
+        monkeypatch.setattr(homework_module, 'catchup_limiter', limiter)
+        monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '1')
+        monkeypatch.setattr(homework_module, 'get_api_answer', lambda date: {
+            'homeworks': [homework('late', 'approved', 4),
+                          homework('early', 'reviewing', 2)],
+            'current_date': timestamp(5),
+        })
+        monkeypatch.setattr(
+            homework_module, 'join_messages', lambda messages: messages
+        )
+        store = checkpoints.MemoryCheckpointStore()
+        result = homework_module.catch_up(
+            Bot(), timestamp(1), dedup.DedupCache(store=store),
+            history.HistoryStore('')
+        )
+        assert result == timestamp(5)
+        assert ['early' in sent[0], 'late' in sent[1]] == [True, True], (
+            'Накопившиеся уведомления должны уходить по времени смены '
+            'статуса.'
+        )
+        assert delays == [2.0], (
+            'Отправка накопившихся уведомлений должна ограничиваться '
+            'по частоте.'
+        )
+
+    def test_stop_interrupts_catch_up_without_marking(
+            self, monkeypatch, homework_module):
+        import pytest
+
+        import checkpoints
+        import dedup
+        import history
+        import lifecycle
+        from exceptions import ShutdownRequested
+        sent = []
+        process = lifecycle.Lifecycle()
+
+        class Bot:
+            def send_message(self, chat_id, text):
+                sent.append(text)
+                process.stop()
+
+        monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '1')
+        monkeypatch.setattr(homework_module, 'get_api_answer', lambda date: {
+            'homeworks': [homework('late', 'approved', 4),
+                          homework('early', 'reviewing', 2)],
+            'current_date': timestamp(5),
+        })
+        monkeypatch.setattr(
+            homework_module, 'join_messages', lambda messages: messages
+        )
+        store = checkpoints.MemoryCheckpointStore()
+        cache = dedup.DedupCache(store=store)
+        with pytest.raises(ShutdownRequested):
+            homework_module.catch_up(
+                Bot(), timestamp(1), cache, history.HistoryStore(''), process
+            )
+        assert len(sent) == 1, 'После сигнала остановки отправка прекращается.'
+        assert len(cache) == 0 and store.notifications == {}, (
+            'Прерванная рассылка не должна отмечать работы отправленными.'
+        )
+
+    def test_main_saves_watermark_after_catch_up(
+            self, monkeypatch, homework_module):
+        import checkpoints
+        import history
+        from exceptions import ShutdownRequested
+        store = checkpoints.MemoryCheckpointStore()
+        saved = []
+
+        def get_api_answer(date):
+            saved.append(dict(store.values))
+            raise ConnectionError('Нет соединения')
+
+        def sleep(delay):
+            raise ShutdownRequested()
+
+        monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'token')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1234:abc')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '1')
+        monkeypatch.setattr(homework_module, 'open_checkpoints', lambda: store)
+        monkeypatch.setattr(
+            homework_module, 'HistoryStore', lambda: history.HistoryStore('')
+        )
+        monkeypatch.setattr(
+            homework_module, 'catch_up', lambda *args: timestamp(5)
+        )
+        monkeypatch.setattr(homework_module, 'get_api_answer', get_api_answer)
+        monkeypatch.setattr(homework_module.time, 'sleep', sleep)
+        monkeypatch.setattr(
+            homework_module.metrics, 'start_server', lambda: None
+        )
+        homework_module.main()
+        assert saved == [{'1': timestamp(5)}], (
+            'Метку после догоняющего опроса нужно сохранить до первого '
+            'обычного опроса.'
+        )
@@ -0,0 +1,319 @@
+import json
+from http import HTTPStatus
+
+import requests
+import utils
+
+
+def mock_get_with_data(data, calls, etag=None):
+    def mocked_response(*args, **kwargs):
+        calls.append(kwargs)
+        status = HTTPStatus.OK
+        if etag and kwargs['headers'].get('If-None-Match') == etag:
+            status = HTTPStatus.NOT_MODIFIED
+        response = utils.MockResponseGET(
+            *args, random_timestamp=data['current_date'],
+            http_status=status
+        )
+        response.headers = {'ETag': etag} if etag else {}
+        response.json = lambda: data
+        return response
+    return mocked_response
+
+
+class TestPoller:
+
+    def test_load_tenants(self, tmp_path):
+        import tenants
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'practicum_token': 'a', 'chat_id': 1},
+            {'practicum_token': 'b', 'chat_id': 2, 'current_date': 10},
+        ]))
+        registry = tenants.load_tenants(path)
+        assert [tenant.name for tenant in registry] == ['1', '2']
+        assert registry[1].current_date == 10
+        assert registry[0].headers == {'Authorization': 'OAuth a'}
+
+    def test_poll_all_tenants_with_own_token(self, monkeypatch,
+                                             random_timestamp):
+        import checkpoints
+        import poller
+        import tenants
+        calls = []
+        data = {
+            'homeworks': [{'homework_name': 'hw123', 'status': 'approved'}],
+            'current_date': random_timestamp
+        }
+        monkeypatch.setattr(requests, 'get', mock_get_with_data(data, calls))
+        registry = [
+            tenants.Tenant('token1', 1, current_date=0),
+            tenants.Tenant('token2', 2, current_date=0),
+        ]
+        bot = utils.MockTelegramBot()
+        engine = poller.Poller(
+            registry, bot, retry_period=60, session=requests,
+            checkpoints=checkpoints.MemoryCheckpointStore()
+        )
+        assert engine.run_due(now=float('inf')) == 2, (
+            'Все пользователи с наступившим сроком должны быть опрошены.'
+        )
+        assert len(engine.outbox) == 2
+        assert engine.outbox.deliver(engine.send) is None
+        assert [call['headers']['Authorization'] for call in calls] == [
+            'OAuth token1', 'OAuth token2'
+        ]
+        assert bot.chat_id == 2
+        assert all(
+            tenant.current_date == random_timestamp for tenant in registry
+        )
+        assert engine.checkpoints.load('1') == random_timestamp, (
+            'После цикла опроса метка должна сохраняться в хранилище.'
+        )
+        assert len(engine.queue) == 2, (
+            'После опроса пользователь должен вернуться в очередь.'
+        )
+
+    def test_pooled_session(self):
+        import sessions
+        session = sessions.create_session(
+            pool_size=3, headers={'Authorization': 'OAuth a'}
+        )
+        adapter = session.get_adapter('https://practicum.yandex.ru/')
+        assert adapter._pool_maxsize == 3
+        assert session.headers['Authorization'] == 'OAuth a'
+        assert session.timeout == sessions.TIMEOUT
+
+    def test_batch_coalesces_messages_per_chat(self):
+        import batching
+        batch = batching.MessageBatch(limit=25)
+        for text in ('first status', 'second', 'third status'):
+            batch.add(1, text)
+        batch.add(2, 'other chat')
+        sent = list(batch.drain())
+        assert sent == [
+            (1, 'first status\n\nsecond'),
+            (1, 'third status'),
+            (2, 'other chat'),
+        ], (
+            'Уведомления для одного чата должны склеиваться в пределах '
+            'лимита длины сообщения.'
+        )
+        assert len(batch) == 0
+
+    def test_parse_homeworks_skips_broken_items(self, homework_module):
+        messages = list(homework_module.parse_homeworks([
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2', 'status': 'unknown'},
+            {'homework_name': 'hw3', 'status': 'rejected'},
+        ]))
+        assert len(messages) == 2, (
+            'Все корректные работы из ответа должны быть обработаны.'
+        )
+
+    def test_outbox_retries_and_survives_restart(self, tmp_path):
+        import outbox
+        spool = str(tmp_path / 'outbox.jsonl')
+        queue = outbox.Outbox(spool_path=spool)
+        queue.put(1, 'first')
+        queue.put(2, 'second')
+        sent = []
+
+        def flaky_send(chat_id, text):
+            if not sent:
+                sent.append(None)
+                error = Exception('Too Many Requests')
+                error.retry_after = 7
+                raise error
+            sent.append((chat_id, text))
+
+        assert queue.deliver(flaky_send) == 7, (
+            'При ошибке нужно выждать `retry_after` из ответа Telegram.'
+        )
+        assert len(queue) == 2, 'Неотправленное сообщение не должно теряться.'
+        queue.not_before = 0
+        assert queue.deliver(flaky_send) is None
+        assert sent[1:] == [(1, 'first'), (2, 'second')]
+
+        queue.put(3, 'third')
+        queue.close()
+        restored = outbox.Outbox(spool_path=spool)
+        assert [message[1:] for message in restored.messages] == [
+            (3, 'third')
+        ], 'Неотправленные сообщения должны восстанавливаться из журнала.'
+        restored.close()
+
+    def test_spool_survives_torn_write_and_is_compacted(
+            self, tmp_path, monkeypatch):
+        import outbox
+        spool = tmp_path / 'outbox.jsonl'
+        spool.write_bytes(
+            '{"id": 0, "chat_id": 1, "text": "целое"}\n'
+            '{"id": 1, "chat_id": 2, "text": "обор'.encode()[:-1]
+        )
+        queue = outbox.Outbox(spool_path=str(spool))
+        assert [message[1:] for message in queue.messages] == [
+            (1, 'целое')
+        ], 'Оборванная последняя строка журнала не должна мешать запуску.'
+        assert queue.deliver(lambda chat_id, text: None) is None
+        assert spool.read_text() == '', (
+            'Когда очередь опустела, журнал нужно сжать.'
+        )
+        monkeypatch.setattr(outbox, 'OUTBOX_SPOOL_LIMIT', 200)
+        queue.spool_limit = 200
+        queue.put(3, 'ждёт')
+        for number in range(20):
+            queue.put(4, f'сообщение {number}')
+            queue.done(queue.messages[-1])
+        assert spool.stat().st_size <= 400, (
+            'Журнал долго работающего процесса не должен расти без предела.'
+        )
+        queue.close()
+        restored = outbox.Outbox(spool_path=str(spool))
+        assert [message[1:] for message in restored.messages] == [
+            (3, 'ждёт')
+        ]
+        restored.close()
+
+    def test_permanent_error_does_not_block_other_chats(self):
+        import outbox
+        from exceptions import TelegramAPIError
+        queue = outbox.Outbox(spool_path='')
+        for chat_id in (1, 2, 3):
+            queue.put(chat_id, f'text{chat_id}')
+        sent = []
+
+        def send(chat_id, text):
+            if chat_id == 1:
+                raise TelegramAPIError(
+                    'Forbidden: bot was blocked by the user', error_code=403
+                )
+            sent.append(chat_id)
+
+        assert queue.deliver(send) is None
+        assert sent == [2, 3], (
+            'Сообщение, которое нельзя доставить, не должно задерживать '
+            'остальные чаты.'
+        )
+        assert len(queue) == 0
+
+    def test_retries_are_capped_per_message(self):
+        import outbox
+        queue = outbox.Outbox(spool_path='', attempts=3)
+        queue.put(1, 'text')
+
+        def send(chat_id, text):
+            raise ConnectionError('сеть недоступна')
+
+        for _ in range(2):
+            assert queue.deliver(send) > 0
+            assert len(queue) == 1
+            queue.not_before = 0
+        assert queue.deliver(send) is None
+        assert len(queue) == 0, (
+            'После исчерпания попыток сообщение снимается с очереди.'
+        )
+
+    def test_unchanged_response_is_not_modified(self, monkeypatch,
+                                                homework_module):
+        import responsecache
+        calls = []
+        data = {'homeworks': [], 'current_date': 100}
+        monkeypatch.setattr(
+            requests, 'get', mock_get_with_data(data, calls, etag='"v1"')
+        )
+        cache = responsecache.ResponseCache()
+        headers = {'Authorization': 'OAuth token'}
+        first = homework_module.request_homeworks(50, headers, cache=cache)
+        assert first == data
+        second = homework_module.request_homeworks(50, headers, cache=cache)
+        assert second is None, (
+            'Неизменившийся ответ (304) не должен разбираться повторно.'
+        )
+        assert calls[1]['headers']['If-None-Match'] == '"v1"'
+        assert 'If-None-Match' not in headers
+        assert cache.hits == 1
+
+    def test_metrics_endpoint(self, monkeypatch, homework_module):
+        import urllib.request
+
+        import metrics
+        monkeypatch.setattr(
+            requests, 'get', mock_get_with_data({'current_date': 1}, [])
+        )
+        polls = metrics.polls.value()
+        homework_module.get_api_answer(0)
+        assert metrics.polls.value() == polls + 1
+        server = metrics.start_server(port=0, host='127.0.0.1')
+        try:
+            url = f'http://127.0.0.1:{server.server_port}/metrics'
+            body = urllib.request.urlopen(url).read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'homework_polls_total' in body
+        assert 'homework_get_api_answer_seconds_count' in body
+
+    def test_json_logs_are_written_off_thread(self, capsys):
+        import json
+        import logging
+
+        import logs
+        logger = logging.getLogger('homework.test_logs')
+        logger.propagate = False
+        listener = logs.configure(logger, log_format='json', queue_size=2)
+        try:
+            logger.error('Ошибка %s', 42)
+        finally:
+            listener.stop()
+        record = json.loads(capsys.readouterr().out)
+        assert record['message'] == 'Ошибка 42'
+        assert record['level'] == 'ERROR'
+
+        handler = logger.handlers[0]
+        logger.handlers.clear()
+        for number in range(5):
+            handler.handle(logging.makeLogRecord({'msg': str(number)}))
+        assert handler.dropped == 3, (
+            'Переполненная очередь журнала не должна блокировать опрос.'
+        )
+
+
+class TestCommands:
+
+    def test_status_is_answered_from_cache(self, monkeypatch,
+                                           random_timestamp):
+        import checkpoints
+        import commands
+        import poller
+        import tenants
+        calls = []
+        data = {
+            'homeworks': [{'homework_name': 'hw.zip', 'status': 'approved'}],
+            'current_date': random_timestamp
+        }
+        monkeypatch.setattr(requests, 'get', mock_get_with_data(data, calls))
+        engine = poller.Poller(
+            [tenants.Tenant('token', 7, current_date=0)],
+            utils.MockTelegramBot(), session=requests,
+            checkpoints=checkpoints.MemoryCheckpointStore()
+        )
+        handler = commands.CommandHandler(engine.board)
+
+        def command(text, chat_id=7):
+            return handler.reply(
+                {'message': {'text': text, 'chat': {'id': chat_id}}}
+            )
+
+        assert command('/status') == (7, commands.UNKNOWN_CHAT)
+        engine.run_due(now=float('inf'))
+        polls = len(calls)
+        chat_id, text = command('/status@homework_bot')
+        assert chat_id == 7 and '"hw.zip": Работа проверена' in text
+        assert 'hw.zip' in command('/history')[1]
+        assert command('привет') is None
+        assert command('/status', chat_id=8)[1] == commands.UNKNOWN_CHAT
+        assert len(calls) == polls, (
+            'Команды не должны приводить к запросам к API Практикума.'
+        )
+        engine.outbox.close()
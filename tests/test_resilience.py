@@ -0,0 +1,397 @@
+class TestAdaptiveSchedule:
+    RETRY_PERIOD = 600
+
+    def test_default_delay_is_retry_period(self):
+        import scheduling
+        schedule = scheduling.AdaptiveSchedule(self.RETRY_PERIOD)
+        assert schedule.next_delay() == self.RETRY_PERIOD
+        schedule.success([{'homework_name': 'hw', 'status': 'approved'}])
+        assert schedule.next_delay() == self.RETRY_PERIOD, (
+            'Базовый интервал опроса должен оставаться `RETRY_PERIOD`.'
+        )
+
+    def test_faster_while_reviewing(self):
+        import scheduling
+        schedule = scheduling.AdaptiveSchedule(self.RETRY_PERIOD, reviewing=60)
+        schedule.success([{'homework_name': 'hw', 'status': 'reviewing'}])
+        schedule.success([])
+        assert schedule.next_delay() == 60, (
+            'Пока работа на ревью, API нужно опрашивать чаще.'
+        )
+        schedule.success([{'homework_name': 'hw', 'status': 'approved'}])
+        assert schedule.next_delay() == self.RETRY_PERIOD
+
+    def test_backoff_when_idle_and_after_errors(self):
+        import scheduling
+        schedule = scheduling.AdaptiveSchedule(
+            self.RETRY_PERIOD, idle_polls=2, idle_period=2000,
+            max_backoff=5000
+        )
+        for _ in range(3):
+            schedule.success([])
+        assert schedule.next_delay() == 1200
+        for _ in range(5):
+            schedule.success([])
+        assert schedule.next_delay() == 2000
+
+        for _ in range(3):
+            schedule.failure()
+        delay = schedule.next_delay()
+        assert 2400 <= delay <= 2400 * (1 + scheduling.JITTER), (
+            'После ошибок интервал должен расти экспоненциально.'
+        )
+        schedule.success([])
+        assert schedule.failures == 0
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter:
+
+    def test_global_rate(self):
+        import ratelimit
+        clock = FakeClock()
+        limiter = ratelimit.RateLimiter(2, clock=clock)
+        delays = [limiter.reserve() for _ in range(4)]
+        assert delays == [0, 0, 0.5, 1.0], (
+            'После исчерпания корзины запросы должны ждать новых токенов.'
+        )
+        clock.now = 10
+        assert limiter.reserve() == 0
+
+    def test_per_chat_rate(self):
+        import ratelimit
+        clock = FakeClock()
+        limiter = ratelimit.RateLimiter(30, key_rate=1, clock=clock)
+        assert limiter.reserve_key(1) == 0
+        assert limiter.reserve_key(2) == 0
+        assert limiter.reserve_key(1) == 1, (
+            'В один чат нельзя отправлять чаще лимита на чат.'
+        )
+
+    def test_delayed_sends_stay_within_global_rate(self):
+        import ratelimit
+        clock = FakeClock()
+        limiter = ratelimit.RateLimiter(
+            30, key_rate=1, clock=clock, capacity=1
+        )
+        queued = [(0, chat) for chat in range(30) for _ in range(2)]
+        queued += [(1, chat) for chat in range(30, 60)]
+        ready = []
+        for at, chat in queued:
+            clock.now = at
+            ready.append(at + limiter.reserve_key(chat))
+        sent = []
+        for at in sorted(ready):
+            clock.now = at
+            sent.append(at + limiter.reserve())
+        busiest = max(
+            sum(start <= other < start + 1 - 1e-9 for other in sent)
+            for start in sent
+        )
+        assert busiest <= 30, (
+            'Отложенные по лимиту чата отправки не должны превышать '
+            f'общий лимит: {busiest} сообщений за секунду.'
+        )
+        assert max(sent) <= 3, (
+            'Чаты не должны ждать друг друга дольше нужного.'
+        )
+
+
+class TestCircuitBreaker:
+
+    def test_script_and_breaker_share_logger(self):
+        import os
+        import subprocess
+        import sys
+
+        from conftest import root_dir
+        env = {
+            **os.environ,
+            'TOKEN_PRACTICUM': 'token',
+            'TOKEN_TELEGRAM': 'token',
+            'CHAT_ID_TELEGRAM': '1',
+        }
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import runpy, breaker; '
+             'script = runpy.run_path("homework.py", run_name="script"); '
+             'print(script["logger"] is breaker.logger)'],
+            cwd=root_dir, env=env, capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == 'True', (
+            'При запуске homework.py скриптом выключатель должен писать '
+            'в настроенный логгер бота.'
+        )
+
+    def test_open_probe_and_close(self):
+        import pytest
+
+        import breaker
+        from exceptions import CircuitOpenError
+        clock = FakeClock()
+        circuit = breaker.CircuitBreaker(
+            failures=2, reset=30, name='test', clock=clock
+        )
+        circuit.failure()
+        circuit.before()
+        circuit.failure()
+        with pytest.raises(CircuitOpenError) as error:
+            circuit.before()
+        assert error.value.retry_after == 30
+        clock.now = 30
+        circuit.before()
+        assert circuit.state == breaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            circuit.before()
+        circuit.failure()
+        clock.now = 60
+        circuit.before()
+        circuit.success()
+        assert circuit.state == breaker.CLOSED, (
+            'Удачный пробный запрос должен замыкать выключатель.'
+        )
+        circuit.before()
+
+    def test_outage_sends_single_probe(self, monkeypatch):
+        import pytest
+        import requests
+
+        import breaker
+        import homework
+        from exceptions import CircuitOpenError, WrongResponseCode
+        calls = []
+
+        def failing_get(*args, **kwargs):
+            calls.append(args)
+            raise requests.ConnectionError('down')
+
+        circuit = breaker.CircuitBreaker(failures=3, name='test')
+        monkeypatch.setattr(homework, 'practicum_breaker', circuit)
+        monkeypatch.setattr(requests, 'get', failing_get)
+        for _ in range(10):
+            with pytest.raises((CircuitOpenError, WrongResponseCode)):
+                homework.get_api_answer(0)
+        assert len(calls) == 3, (
+            'При разомкнутом выключателе запросы не должны уходить в сеть.'
+        )
+
+
+class TestDeadline:
+
+    def test_timeouts_are_clipped_to_budget(self):
+        import timeouts
+        clock = FakeClock()
+        deadline = timeouts.Deadline(10, clock=clock)
+        assert deadline.timeout((5, 30)) == (5, 10)
+        clock.now = 9.5
+        assert deadline.timeout((5, 30)) == (0.5, 0.5)
+        clock.now = 10
+        assert deadline.expired
+
+    def test_slow_upstream_defers_remaining_tenants(self, monkeypatch):
+        import breaker
+        import checkpoints
+        import homework
+        import poller
+        import sessions
+        import tenants
+        from timeouts import Deadline
+        clock = FakeClock()
+        timeouts = []
+
+        class SlowSession:
+            def get(self, url, timeout=None, **kwargs):
+                timeouts.append(timeout)
+                clock.now += 8
+                raise sessions.requests.Timeout('read timeout')
+
+        monkeypatch.setattr(
+            homework, 'practicum_breaker', breaker.CircuitBreaker(name='test')
+        )
+        engine = poller.Poller(
+            [tenants.Tenant(str(number), number) for number in range(5)],
+            bot=None, session=SlowSession(),
+            checkpoints=checkpoints.MemoryCheckpointStore()
+        )
+        budget = Deadline(20, clock=clock)
+        assert engine.run_due(now=float('inf'), budget=budget) == 3, (
+            'После истечения срока цикла опросы должны откладываться.'
+        )
+        assert timeouts[-1][1] == 4, (
+            'Таймаут запроса должен урезаться до остатка срока цикла.'
+        )
+        assert len(engine.queue) == 5
+        engine.outbox.close()
+
+
+class TestLifecycle:
+
+    def test_stop_interrupts_sleep(self):
+        import lifecycle
+        from exceptions import ShutdownRequested
+        state = lifecycle.Lifecycle()
+        state.stop()
+        try:
+            with state.interruptible():
+                raise AssertionError('Пауза после остановки не нужна.')
+        except ShutdownRequested:
+            pass
+        assert state.stopping
+
+    def test_reload_flag_is_taken_once(self):
+        import lifecycle
+        state = lifecycle.Lifecycle()
+        state.request_reload()
+        assert state.take_reload()
+        assert not state.take_reload()
+
+    def test_reload_keeps_config_and_bot_unless_token_changes(
+            self, monkeypatch, homework_module):
+        closed = []
+
+        class Bot:
+            def __init__(self, token):
+                self.token = token
+
+        monkeypatch.setattr(homework_module, 'load_env', lambda override: 0)
+        monkeypatch.setattr(homework_module, 'close_bot', closed.append)
+        monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'old')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1:old')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '1')
+        monkeypatch.setattr(
+            homework_module, 'HEADERS', {'Authorization': 'OAuth old'}
+        )
+        monkeypatch.setenv('TOKEN_PRACTICUM', '')
+        monkeypatch.setenv('TOKEN_TELEGRAM', '1:old')
+        monkeypatch.setenv('CHAT_ID_TELEGRAM', '2')
+        bot = Bot('1:old')
+        assert homework_module.reload_bot(bot) is bot
+        assert homework_module.HEADERS == {'Authorization': 'OAuth old'}, (
+            'Неполные настройки не должны заменять рабочие.'
+        )
+        assert homework_module.TELEGRAM_CHAT_ID == '1'
+
+        monkeypatch.setenv('TOKEN_PRACTICUM', 'new')
+        assert homework_module.reload_bot(bot) is bot, (
+            'Без смены токена клиент Bot API пересоздавать не нужно.'
+        )
+        assert homework_module.HEADERS == {'Authorization': 'OAuth new'}
+        assert homework_module.TELEGRAM_CHAT_ID == '2'
+
+        monkeypatch.setenv('TOKEN_TELEGRAM', '1:new')
+        renewed = homework_module.reload_bot(bot)
+        assert renewed.token == '1:new' and closed == [bot]
+
+    def test_poller_reload_keeps_existing_tenants(self):
+        import checkpoints
+        import poller
+        import tenants
+        engine = poller.Poller(
+            [tenants.Tenant('a', 1), tenants.Tenant('b', 2)], bot=None,
+            session=object(), checkpoints=checkpoints.MemoryCheckpointStore()
+        )
+        first = engine.tenants['1']
+        engine.reload([tenants.Tenant('new', 1), tenants.Tenant('c', 3)])
+        assert set(engine.tenants) == {'1', '3'}
+        assert engine.tenants['1'] is first and first.token == 'new', (
+            'Оставшийся пользователь должен сохранить своё состояние.'
+        )
+        engine.outbox.close()
+
+    def test_stuck_send_is_not_repeated_on_shutdown(self, monkeypatch):
+        import threading
+
+        import checkpoints
+        import history
+        import lifecycle
+        import poller
+        state = lifecycle.Lifecycle()
+        release = threading.Event()
+        calls = []
+
+        class StuckBot:
+            def send_message(self, chat_id, text):
+                calls.append(text)
+                state.stop()
+                release.wait(5)
+
+        monkeypatch.setattr(poller, 'SHUTDOWN_TIMEOUT', 0.1)
+        engine = poller.Poller(
+            [], bot=StuckBot(), session=object(),
+            checkpoints=checkpoints.MemoryCheckpointStore(),
+            history=history.HistoryStore(''), listen_commands=False
+        )
+        engine.outbox.put(1, 'text')
+        engine.run(state)
+        assert calls == ['text'], (
+            'Сообщение, которое ещё отправляет фоновый поток, '
+            'не должно отправляться повторно при остановке.'
+        )
+        release.set()
+
+    def test_async_stop_with_empty_registry(self, monkeypatch):
+        import asyncio
+
+        import aio
+        import checkpoints
+        import history
+        monkeypatch.setattr(aio.commands, 'BOT_COMMANDS', False)
+        engine = aio.AsyncPoller(
+            [], session=None, checkpoints=checkpoints.MemoryCheckpointStore(),
+            history=history.HistoryStore('')
+        )
+        engine.stopping.set()
+        asyncio.run(engine.run())
+        assert engine.tasks == {}
+
+
+class TestErrorAlerts:
+
+    def test_repeats_are_summarized_and_recovery_reported(self):
+        import alerts
+        from exceptions import WrongResponseCode
+        clock = FakeClock()
+        sent = []
+        notifier = alerts.ErrorAlerts(
+            lambda chat_id, text: sent.append(text),
+            interval=600, enabled=True, clock=clock
+        )
+        for minute in range(30):
+            clock.now = minute * 60
+            notifier.failure(1, WrongResponseCode(
+                f'Код ответа API: 500, from_date={1700000000 + minute}'
+            ))
+        assert len(sent) == 3, (
+            'Повторы одного сбоя должны сворачиваться в редкие сводки.'
+        )
+        assert sent[1].endswith('ещё 10 раз за 10 мин')
+        notifier.failure(1, TypeError('В ответе API не словарь'))
+        assert len(sent) == 4, 'О новом сбое нужно сообщать сразу.'
+        notifier.recovered(1)
+        assert sent[-1].startswith('Работа восстановлена.')
+        assert '30 раз' in sent[-1]
+        notifier.recovered(1)
+        assert len(sent) == 5
+
+    def test_alerts_are_off_by_default_and_go_to_operator(self):
+        import alerts
+        sent = []
+        assert not alerts.ErrorAlerts(print).enabled, (
+            'Уведомления о сбоях должны быть выключены по умолчанию.'
+        )
+        notifier = alerts.ErrorAlerts(
+            lambda chat_id, text: sent.append((chat_id, text)),
+            enabled=True, operator_chat=99
+        )
+        notifier.failure(1, TypeError('В ответе API не словарь'))
+        assert sent == [
+            (99, 'Чат 1: Сбой в работе программы: В ответе API не словарь')
+        ]
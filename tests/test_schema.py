@@ -0,0 +1,33 @@
+import pytest
+
+
+class TestSchema:
+
+    def test_all_violations_in_one_error(self):
+        import schema
+        from exceptions import SchemaError
+        with pytest.raises(SchemaError) as error:
+            schema.load_response({'homeworks': {}})
+        assert error.value.violations == [
+            'homeworks: неверный тип dict', 'current_date: нет ключа'
+        ]
+        with pytest.raises(TypeError):
+            schema.load_response([])
+
+    def test_broken_items_are_rejected(self):
+        import schema
+        checked = schema.load_response({'current_date': 1, 'homeworks': [
+            {'homework_name': 'hw1', 'status': 'approved', 'id': 1},
+            {'homework_name': 'hw2', 'status': 'unknown'},
+            {'status': 'rejected'},
+        ]})
+        assert [hw.homework_name for hw in checked.homeworks] == ['hw1']
+        assert checked.rejected == [
+            'homeworks[1].status: неизвестное значение unknown',
+            'homeworks[2].homework_name: нет ключа',
+        ]
+        homework = checked.homeworks[0]
+        assert homework.get('date_updated', '') == ''
+        assert not hasattr(homework, '__dict__'), (
+            'Записи работ должны быть лёгкими объектами со __slots__.'
+        )
@@ -0,0 +1,89 @@
+class TestHashRing:
+
+    def test_tenants_are_split_between_workers(self):
+        import sharding
+        import tenants
+        registry = [tenants.Tenant(f't{number}', number) for number in
+                    range(1000)]
+        shards = [
+            sharding.shard_tenants(registry, range(4), member)
+            for member in range(4)
+        ]
+        names = [tenant.name for shard in shards for tenant in shard]
+        assert sorted(names) == sorted(tenant.name for tenant in registry), (
+            'Каждый пользователь должен достаться ровно одному воркеру.'
+        )
+        assert all(150 < len(shard) < 350 for shard in shards), (
+            'Пользователи должны распределяться примерно поровну.'
+        )
+
+    def test_only_leaving_share_moves(self):
+        import sharding
+        keys = [str(number) for number in range(1000)]
+        ring = sharding.HashRing(range(4))
+        before = {key: ring.owner(key) for key in keys}
+        ring.remove(3)
+        after = {key: ring.owner(key) for key in keys}
+        moved = [key for key in keys if before[key] != after[key]]
+        assert all(before[key] == 3 for key in moved), (
+            'При уходе воркера переезжают только его пользователи.'
+        )
+        ring.add(3)
+        assert {key: ring.owner(key) for key in keys} == before
+
+    def test_state_file_round_trip(self, tmp_path):
+        import sharding
+        path = tmp_path / 'shards.json'
+        sharding.write_members([2, 0], path)
+        assert sharding.read_members(path) == [0, 2]
+
+
+class TestHandover:
+
+    def test_moved_tenant_keeps_watermark_and_sent_keys(self, tmp_path):
+        import checkpoints
+        import dedup
+        path = str(tmp_path / 'checkpoints.sqlite3')
+        receiver = checkpoints.open_checkpoints(path)
+        receiver_sent = dedup.DedupCache(store=receiver)
+
+        owner = checkpoints.open_checkpoints(path)
+        owner_sent = dedup.DedupCache(store=owner)
+        homework = {'homework_name': 'hw', 'status': 'approved'}
+        assert owner_sent.filter(7, [homework])
+        owner.save('tenant', 1000)
+        owner.close()
+
+        assert receiver.load('tenant') == 1000, (
+            'Новый воркер должен продолжать с метки прежнего.'
+        )
+        receiver_sent.refresh(7)
+        assert receiver_sent.filter(7, [homework]) == [], (
+            'Новый воркер не должен повторять уже отправленное.'
+        )
+        receiver.close()
+
+    def test_workers_do_not_listen_for_commands(self, monkeypatch):
+        import sharding
+        engines = []
+
+        class Lifecycle:
+            def install(self):
+                return self
+
+        class Engine:
+            def __init__(self, tenants, bot, **kwargs):
+                engines.append(kwargs)
+
+            def run(self, lifecycle):
+                pass
+
+        monkeypatch.setattr(sharding, 'Poller', Engine)
+        monkeypatch.setattr(sharding, 'Lifecycle', Lifecycle)
+        monkeypatch.setattr(sharding, 'create_bot', lambda token: None)
+        monkeypatch.setattr(sharding, 'load_shard', lambda *args, **kw: [])
+        monkeypatch.setattr(sharding.metrics, 'METRICS_PORT', None)
+        sharding.run_worker(0, [0])
+        assert engines[0]['listen_commands'] is False, (
+            'Команды слушает один процесс, а не каждый воркер.'
+        )
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+from conftest import root_dir
+
+HEAVY = ('telegram', 'requests', 'dotenv', 'http.server')
+
+
+class TestStartup:
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        env = {
+            **os.environ,
+            'TOKEN_PRACTICUM': 'token',
+            'TOKEN_TELEGRAM': 'token',
+            'CHAT_ID_TELEGRAM': '1',
+        }
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, homework, lazy; '
+             'print(*(name for name in sys.argv[1:] if lazy.is_loaded(name)))',
+             *HEAVY],
+            cwd=root_dir, env=env, capture_output=True, text=True, check=True
+        )
+        assert result.stdout.split() == [], (
+            'Импорт homework не должен загружать telegram, requests и '
+            'dotenv, пока они не понадобились.'
+        )
+
+    def test_lazy_module_loads_on_attribute_access(self):
+        import lazy
+        module = lazy.lazy_import('colorsys')
+        assert not lazy.is_loaded('colorsys')
+        assert module.rgb_to_hsv(0, 0, 0) == (0, 0, 0)
+        assert lazy.is_loaded('colorsys')
@@ -0,0 +1,94 @@
+class TestCheckpoints:
+
+    def test_sqlite_checkpoints_survive_restart(self, tmp_path,
+                                                random_timestamp):
+        import checkpoints
+        path = str(tmp_path / 'checkpoints.sqlite3')
+        store = checkpoints.open_checkpoints(path)
+        store.stage('1', random_timestamp)
+        store.stage('2', random_timestamp + 1)
+        assert store.load('1') == random_timestamp
+        store.close()
+
+        restored = checkpoints.open_checkpoints(path)
+        assert restored.load('1') == random_timestamp, (
+            'Метка current_date должна восстанавливаться после перезапуска.'
+        )
+        assert restored.load('2') == random_timestamp + 1
+        assert restored.load('3') is None
+        restored.close()
+
+    def test_empty_path_keeps_checkpoints_in_memory(self):
+        import checkpoints
+        store = checkpoints.open_checkpoints('')
+        assert isinstance(store, checkpoints.MemoryCheckpointStore)
+
+
+class TestDedupCache:
+    HOMEWORK = {'id': 1, 'homework_name': 'hw123', 'status': 'approved'}
+
+    def test_duplicate_status_is_suppressed(self):
+        import dedup
+        cache = dedup.DedupCache(size=10, ttl=100)
+        assert cache.filter(1, [self.HOMEWORK], now=0) == [self.HOMEWORK]
+        assert cache.filter(1, [self.HOMEWORK], now=1) == [], (
+            'Повторное уведомление о том же статусе должно подавляться.'
+        )
+        rejected = dict(self.HOMEWORK, status='rejected')
+        assert cache.filter(1, [rejected], now=2) == [rejected]
+        assert cache.filter(2, [self.HOMEWORK], now=3) == [self.HOMEWORK]
+
+    def test_cache_is_bounded(self):
+        import dedup
+        cache = dedup.DedupCache(size=2, ttl=100)
+        for key in 'abc':
+            cache.add(key, now=0)
+        assert len(cache) == 2, 'Размер кэша должен быть ограничен.'
+        assert cache.add('a', now=1), 'Вытесненный ключ должен забываться.'
+        assert cache.add('b', now=200), 'Устаревший ключ должен забываться.'
+
+    def test_cache_survives_restart(self, tmp_path):
+        import checkpoints
+        import dedup
+        path = str(tmp_path / 'checkpoints.sqlite3')
+        store = checkpoints.open_checkpoints(path)
+        dedup.DedupCache(store=store).filter(1, [self.HOMEWORK])
+        store.close()
+        store = checkpoints.open_checkpoints(path)
+        assert dedup.DedupCache(store=store).filter(1, [self.HOMEWORK]) == []
+        store.close()
+
+
+class TestHistoryStore:
+
+    def test_time_in_review_and_rejections(self, tmp_path):
+        import history
+        path = str(tmp_path / 'history.sqlite3')
+        store = history.HistoryStore(path)
+
+        def event(tenant, name, status, hour, lesson=None):
+            store.record(tenant, {
+                'homework_name': name, 'status': status,
+                'lesson_name': lesson,
+                'date_updated': f'2022-12-01T{hour:02}:00:00Z',
+            })
+
+        event('a', 'hw1.zip', 'reviewing', 1, 'Спринт 1')
+        event('a', 'hw1.zip', 'rejected', 3, 'Спринт 1')
+        event('a', 'hw1.zip', 'reviewing', 4, 'Спринт 1')
+        event('a', 'hw1.zip', 'approved', 5, 'Спринт 1')
+        event('b', 'hw1.zip', 'reviewing', 1, 'Спринт 1')
+        event('b', 'hw2.zip', 'rejected', 2)
+        event('b', 'hw3.zip', 'reviewing', 2)
+        store.close()
+
+        store = history.HistoryStore(path)
+        assert list(store.time_in_review()) == [
+            ('a', 'hw1.zip', 3 * 3600)
+        ], 'Незавершённое ревью не должно учитываться.'
+        assert sorted(store.rejections_per_project()) == [
+            ('hw2.zip', 1), ('Спринт 1', 1)
+        ]
+        assert list(store.rejections_per_project('b')) == [('hw2.zip', 1)]
+        assert len(list(store.events('a'))) == 4
+        store.close()
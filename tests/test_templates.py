@@ -0,0 +1,60 @@
+import schema
+
+
+class TestTemplates:
+    DATA = {
+        'homework_name': 'hw_1.zip',
+        'status': 'rejected',
+        'reviewer_comment': 'Поправьте тесты (см. PR).',
+    }
+    HOMEWORK = schema.HOMEWORK.load(DATA)
+
+    def test_text_matches_parse_status(self, homework_module):
+        import templates
+        assert templates.render(self.HOMEWORK) == (
+            homework_module.parse_status(self.DATA)
+        )
+
+    def test_locale_and_comment(self):
+        import templates
+        message = templates.render(self.HOMEWORK, 'en', comments=True)
+        assert message.startswith('Review status of "hw_1.zip"')
+        assert message.endswith('Reviewer comment: Поправьте тесты (см. PR).')
+        assert templates.render(self.HOMEWORK, 'xx') == (
+            templates.render(self.HOMEWORK)
+        ), 'Для неизвестного языка используется язык по умолчанию.'
+
+    def test_markup_is_escaped(self, monkeypatch):
+        import templates
+        monkeypatch.setattr(
+            templates, 'TEMPLATES', templates.compile_templates('html')
+        )
+        monkeypatch.setattr(templates, 'ESCAPE', templates.FORMATS['html'][1])
+        homework = schema.HOMEWORK.load({**self.DATA, 'homework_name': '<b>&'})
+        assert '<b>&lt;b&gt;&amp;</b>' in templates.render(homework)
+        monkeypatch.setattr(
+            templates, 'TEMPLATES', templates.compile_templates('markdown')
+        )
+        monkeypatch.setattr(templates, 'ESCAPE', templates.escape_markdown)
+        assert '*hw\\_1\\.zip*' in templates.render(self.HOMEWORK)
+
+    def test_alerts_and_commands_are_escaped(self, monkeypatch):
+        import alerts
+        import commands
+        import templates
+        monkeypatch.setattr(templates, 'ESCAPE', templates.escape_markdown)
+        sent = []
+        notifier = alerts.ErrorAlerts(
+            lambda chat_id, text: sent.append(text), enabled=True
+        )
+        notifier.failure(1, ConnectionError('<HTTPSConnection at 0x1f>.'))
+        assert sent[0].endswith('at 0x1f\\>\\.'), (
+            'Текст сбоя должен экранироваться под выбранную разметку.'
+        )
+        board = commands.StatusBoard()
+        board.update(1, [{'homework_name': 'hw_1', 'status': 'approved'}])
+        _, text = commands.CommandHandler(board).reply(
+            {'message': {'text': '/status', 'chat': {'id': 1}}}
+        )
+        assert '"hw\\_1": Работа проверена' in text
+        assert text.endswith('Ура\\!')
@@ -0,0 +1,46 @@
+"""Таймауты запросов и сроки выполнения циклов опроса.
+Модуль не импортирует HTTP-клиентов, поэтому его константы доступны
+без загрузки requests и aiohttp.
+"""
+import os
+import time
+
+TIMEOUT = (
+    float(os.getenv('HTTP_CONNECT_TIMEOUT', 5)),
+    float(os.getenv('HTTP_READ_TIMEOUT', 30)),
+)
+REQUEST_DEADLINE = float(os.getenv('HTTP_REQUEST_DEADLINE', 60))
+CYCLE_BUDGET = float(os.getenv('CYCLE_BUDGET', 120))
+MIN_TIMEOUT = 0.001
+
+
+class Deadline:
+    """Срок, к которому должна завершиться работа.
+    cancelled - необязательная функция: если она вернула True,
+    срок считается истёкшим досрочно (например, по сигналу остановки).
+    """
+
+    __slots__ = ('expires', 'clock', 'cancelled')
+
+    def __init__(self, seconds, cancelled=None, clock=time.monotonic):
+        """Срок истекает через seconds секунд по часам clock."""
+        self.clock = clock
+        self.expires = clock() + seconds
+        self.cancelled = cancelled
+
+    def remaining(self):
+        """Сколько секунд осталось."""
+        return max(0, self.expires - self.clock())
+
+    @property
+    def expired(self):
+        """Срок истёк или работа отменена."""
+        return (
+            self.remaining() == 0
+            or (self.cancelled is not None and self.cancelled())
+        )
+
+    def timeout(self, timeout=TIMEOUT):
+        """Таймауты (connect, read), урезанные до оставшегося срока."""
+        remaining = max(self.remaining(), MIN_TIMEOUT)
+        return tuple(min(part, remaining) for part in timeout)